@@ -0,0 +1,6 @@
+"""
+헤이딜러·리본카 크롤러 공용 모듈.
+
+각 사이트 스크립트(heydealer/, reborncar/)에서 프로젝트 루트를 sys.path에 추가한 뒤
+`from common.xxx import ...` 형태로 사용합니다.
+"""
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+행 단위 CSV 저장용 버퍼 writer (파일 핸들 유지 + 묶음 쓰기, 스레드 안전).
+
+행마다 open/exists/DictWriter 생성하던 save_to_csv_append·인라인 open(..., "a") 대신:
+- 파일은 처음 한 번만 열고(새 파일·빈 파일이면 헤더 기록) 실행 내내 유지
+- FLUSH_ROWS 행이 모이거나 FLUSH_SECS 초가 지나면 한 번에 writerows + flush
+- checkpoint()/close() 때 fsync까지 해서 중간 종료 시에도 그 시점까지는 디스크에 남음
+여러 워커 스레드가 같은 writer를 공유해도 lock으로 한 행씩 온전히 기록됩니다.
+
+사용:
+    with BufferedCsvWriter(path, fieldnames) as w:
+        w.writerow(row)
+"""
+import csv
+import os
+import threading
+import time
+from pathlib import Path
+
+FLUSH_ROWS = 200
+FLUSH_SECS = 5.0
+
+
+class BufferedCsvWriter:
+    def __init__(self, path, fieldnames, flush_rows=FLUSH_ROWS, flush_secs=FLUSH_SECS, encoding="utf-8-sig"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fieldnames = list(fieldnames)
+        self.flush_rows = flush_rows
+        self.flush_secs = flush_secs
+        new_file = not self.path.exists() or self.path.stat().st_size == 0
+        # 이어쓰기 시 BOM 중복 방지: 새 파일일 때만 utf-8-sig
+        self._f = open(self.path, "a", newline="", encoding=encoding if new_file else "utf-8")
+        self._writer = csv.DictWriter(self._f, fieldnames=self.fieldnames, extrasaction="ignore")
+        if new_file:
+            self._writer.writeheader()
+        self._buf = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self.n_rows = 0
+
+    def writerow(self, row):
+        with self._lock:
+            self._buf.append(row)
+            self.n_rows += 1
+            if len(self._buf) >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_secs:
+                self._flush_locked()
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    def _flush_locked(self):
+        if self._buf:
+            self._writer.writerows(self._buf)
+            self._buf = []
+        self._f.flush()
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def checkpoint(self):
+        """버퍼 기록 + fsync (페이지·차종 단위 등 체크포인트에서 호출)"""
+        with self._lock:
+            self._flush_locked()
+            os.fsync(self._f.fileno())
+
+    def close(self):
+        with self._lock:
+            if self._f.closed:
+                return
+            self._flush_locked()
+            os.fsync(self._f.fileno())
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+목록·상세 CSV의 표시용 문자열(가격·주행거리·연식)을 숫자 컬럼으로 바꾸는 후처리 단계 (pandas 벡터 연산).
+
+- 가격: '3,990만원', '1억 2,000만원', '0' → 원 단위 정수 (<컬럼>_won)
+  단위 없는 숫자는 사이트 표시 기준대로 만원 단위로 읽음 ('3990' → 39,900,000원).
+  원 단위 원시값이 섞이지 않도록 단위 없는 숫자가 BARE_MAN_MAX(만원)를 넘으면 변환하지 않고 해석 실패로 보고
+- 할인: 리본카 amtsel '200만원 할인', '200만원↓' → discount_won 2,000,000 ('↑'은 인상이라 음수)
+- 주행거리: '3.3만km', '12,345km' → km 정수 (km_num)
+- 연식: '2024년 (23/11)', '20년 03월' → 연식(model_year) + 최초등록 연월(first_reg_ym, 'YYYY-MM')
+- 신차가격대비: '54%' → relamt_pct, '2,430만원↓' → relamt_won (신차보다 싼 금액, '↑'이면 음수)
+원본 문자열 컬럼은 그대로 두고 숫자 컬럼을 옆에 추가하며,
+빈 값·'-'·'판매완료' 등 값 없음 표시가 아닌데 해석하지 못한 값은 컬럼별 건수·예시로 보고합니다.
+
+사용:
+    python common/field_normalizer.py                       # result/ 아래 헤이딜러·리본카 list/detail 4개
+    python common/field_normalizer.py result/heydealer/heydealer_list.csv
+→ 같은 폴더에 <이름>_normalized.csv 저장
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RESULT_DIR = Path(__file__).resolve().parent.parent / "result"
+
+# 해석 실패로 보지 않는 '값 없음' 표시
+MISSING_TOKENS = ("", "-", "판매완료", "준비중", "nan")
+
+# 단위 없는 숫자(만원 단위로 읽음)의 상한 — 99,999만원(약 10억) 초과면 원 단위 원시값으로 보고 변환하지 않음
+BARE_MAN_MAX = 99_999
+
+# 파일 이름 → {원본 컬럼: 변환 종류}
+SPECS = {
+    "heydealer_list": {"sale_price": "won", "km": "km", "year": "year"},
+    "heydealer_detail": {"km": "km", "year": "year"},
+    "reborncar_list": {"car_main_pay": "won", "amtsel": "discount", "release_dt": "year"},
+    "reborncar_detail": {"relamt_per-parent": "relamt"},
+}
+
+_WON_RE = r"^(?:(?P<eok>\d+(?:\.\d+)?)억)?(?P<man>\d+(?:\.\d+)?)?(?P<unit>만)?(?P<won>원)?$"
+# 할인·증감 표시 (금액 뒤에 붙음)
+_DIRECTION_RE = r"(할인|↓|↑)$"
+_KM_RE = r"^(?P<num>\d+(?:\.\d+)?)(?P<unit>만|천)?km$"
+_YEAR_RE = r"^(?P<year>\d{2}|\d{4})년(?:\((?P<ry>\d{2})[/.](?P<rm>\d{1,2})\)|(?P<m>\d{1,2})월)?"
+
+
+def _clean(series):
+    """공백·쉼표 제거한 문자열 Series (NaN은 '')"""
+    return series.fillna("").astype(str).str.replace(r"[\s,]", "", regex=True)
+
+
+def _bad_mask(clean, parsed_ok):
+    return ~parsed_ok & ~clean.isin(MISSING_TOKENS)
+
+
+def parse_won(series):
+    """
+    가격 문자열 → (원 단위 Int64 Series, 해석 실패 mask).
+    단위 없는 숫자는 만원 단위로 봄 (사이트 표시 기준) — BARE_MAN_MAX 초과는 원 단위 값으로 보고 해석 실패 처리.
+    '할인'·'↓'·'↑'이 붙은 값은 가격이 아니므로 해석 실패 (parse_discount 사용)
+    """
+    clean = _clean(series)
+    m = clean.str.extract(_WON_RE)
+    eok = pd.to_numeric(m["eok"], errors="coerce")
+    man = pd.to_numeric(m["man"], errors="coerce")
+    bare = eok.isna() & m["unit"].isna() & m["won"].isna()
+    ok = (eok.notna() | man.notna()) & ~(bare & (man > BARE_MAN_MAX))
+    won = (eok.fillna(0) * 100_000_000 + man.fillna(0) * 10_000).where(ok)
+    return won.round().astype("Int64"), _bad_mask(clean, ok)
+
+
+def parse_discount(series):
+    """
+    할인·증감 금액 문자열 → (원 단위 Int64 Series, 해석 실패 mask).
+    '200만원 할인'·'200만원↓' → 2,000,000 (내려간 금액), '200만원↑' → -2,000,000, 표시 없는 '0'·'200만원'은 할인으로 봄
+    """
+    clean = _clean(series)
+    direction = clean.str.extract(_DIRECTION_RE)[0]
+    won, _ = parse_won(clean.str.replace(_DIRECTION_RE, "", regex=True))
+    signed = won.where(direction != "↑", -won)
+    return signed, _bad_mask(clean, won.notna())
+
+
+def parse_km(series):
+    """주행거리 문자열 → (km Int64 Series, 해석 실패 mask)"""
+    clean = _clean(series).str.lower()
+    m = clean.str.extract(_KM_RE)
+    num = pd.to_numeric(m["num"], errors="coerce")
+    scale = np.select([m["unit"] == "만", m["unit"] == "천"], [10_000, 1_000], default=1)
+    km = (num * scale).round()
+    return km.astype("Int64"), _bad_mask(clean, num.notna())
+
+
+def parse_year(series):
+    """연식 문자열 → (DataFrame[model_year, first_reg_ym], 해석 실패 mask). 2자리 연도는 2000년대로 봄"""
+    clean = _clean(series)
+    m = clean.str.extract(_YEAR_RE)
+    year = pd.to_numeric(m["year"], errors="coerce")
+    year = year.where(year >= 100, year + 2000)
+    # '(23/11)' 은 최초등록 연/월, '03월' 은 연식 연도의 월
+    reg_y = pd.to_numeric(m["ry"], errors="coerce") + 2000
+    reg_y = reg_y.fillna(year.where(m["m"].notna()))
+    reg_m = pd.to_numeric(m["rm"].fillna(m["m"]), errors="coerce")
+    ok_reg = reg_y.notna() & reg_m.between(1, 12)
+    first_reg = (
+        reg_y.astype("Int64").astype(str) + "-" + reg_m.astype("Int64").astype(str).str.zfill(2)
+    ).where(ok_reg)
+    out = pd.DataFrame({"model_year": year.astype("Int64"), "first_reg_ym": first_reg.astype("string")})
+    return out, _bad_mask(clean, year.notna())
+
+
+def parse_relamt(series):
+    """신차가격대비 → (DataFrame[relamt_pct, relamt_won], 해석 실패 mask). relamt_won은 신차보다 싼 금액 ('↑'이면 음수)"""
+    clean = _clean(series)
+    pct = pd.to_numeric(clean.str.extract(r"^(\d+(?:\.\d+)?)%")[0], errors="coerce")
+    won, _ = parse_discount(clean.where(pct.isna(), ""))
+    out = pd.DataFrame({"relamt_pct": pct, "relamt_won": won})
+    return out, _bad_mask(clean, pct.notna() | won.notna())
+
+
+def normalize_frame(df, spec):
+    """
+    spec({원본 컬럼: 'won'|'discount'|'km'|'year'|'relamt'})대로 숫자 컬럼을 추가한 DataFrame과
+    해석 실패 보고 {컬럼: (건수, 예시 값 최대 5개)} 반환. 원본 컬럼은 유지
+    """
+    out = df.copy()
+    report = {}
+    for col, kind in spec.items():
+        if col not in out.columns:
+            continue
+        if kind == "won":
+            values, bad = parse_won(out[col])
+            out[f"{col}_won"] = values
+        elif kind == "discount":
+            values, bad = parse_discount(out[col])
+            out["discount_won"] = values
+        elif kind == "km":
+            values, bad = parse_km(out[col])
+            out[f"{col}_num"] = values
+        elif kind == "year":
+            values, bad = parse_year(out[col])
+            out[values.columns] = values
+        elif kind == "relamt":
+            values, bad = parse_relamt(out[col])
+            out[values.columns] = values
+        else:
+            raise ValueError(f"알 수 없는 변환 종류: {kind}")
+        n_bad = int(bad.sum())
+        if n_bad:
+            report[col] = (n_bad, out.loc[bad, col].astype(str).value_counts().index[:5].tolist())
+    return out, report
+
+
+def normalize_csv(path, spec=None, out_path=None):
+    """CSV 하나 정규화 → <이름>_normalized.csv 저장. (저장 경로, 행 수, 보고) 반환"""
+    path = Path(path)
+    spec = spec if spec is not None else SPECS.get(path.stem, {})
+    df = pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+    out, report = normalize_frame(df, spec)
+    out_path = Path(out_path) if out_path else path.with_name(f"{path.stem}_normalized.csv")
+    out.to_csv(out_path, index=False, encoding="utf-8-sig")
+    return out_path, len(out), report
+
+
+def main(paths):
+    for path in paths:
+        path = Path(path)
+        if not path.exists():
+            print(f"⏭️ 파일 없음: {path}")
+            continue
+        out_path, n_rows, report = normalize_csv(path)
+        print(f"✅ {path.name}: {n_rows:,}행 → {out_path}")
+        for col, (n_bad, samples) in report.items():
+            print(f"   ⚠️ {col}: 해석 실패 {n_bad:,}건 (예: {samples})")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:] or [
+        RESULT_DIR / "heydealer" / "heydealer_list.csv",
+        RESULT_DIR / "heydealer" / "heydealer_detail.csv",
+        RESULT_DIR / "reborncar" / "reborncar_list.csv",
+        RESULT_DIR / "reborncar" / "reborncar_detail.csv",
+    ])
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+URL 단위 디스크 응답 캐시 (TTL + ETag/Last-Modified 재검증).
+
+- TTL 안의 캐시는 요청 없이 바로 반환합니다.
+- TTL이 지난 캐시는 If-None-Match / If-Modified-Since 조건부 요청을 보내고, 304면 저장된 본문을 재사용합니다.
+- 200 응답만 저장하며, 요청은 모두 rate_limiter.request_with_retry를 거칩니다.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+from common.rate_limiter import request_with_retry
+
+# 기본 TTL (초): car_meta 계층은 자주 바뀌지 않으므로 하루
+DEFAULT_TTL = 24 * 60 * 60
+
+
+class CachedResponse:
+    """requests.Response 중 크롤러가 쓰는 부분(status_code, headers, text, json, raise_for_status)만 흉내"""
+
+    def __init__(self, url, status_code, headers, text, source):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+        # "fresh"(TTL 내 캐시) | "revalidated"(304) | "network"(새로 받음)
+        self.source = source
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+
+class HttpCache:
+    def __init__(self, cache_dir, default_ttl=DEFAULT_TTL):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.default_ttl = default_ttl
+        self.stats = {"fresh": 0, "revalidated": 0, "network": 0}
+        self._lock = threading.Lock()
+
+    def _path(self, url):
+        return self.cache_dir / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+    def _load(self, url):
+        path = self._path(url)
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            return entry if entry.get("url") == url else None
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, entry):
+        path = self._path(entry["url"])
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def _count(self, source):
+        with self._lock:
+            self.stats[source] += 1
+
+    def get(self, session, url, ttl=None, **kwargs):
+        """캐시를 거친 GET. kwargs는 session.request로 그대로 전달."""
+        ttl = self.default_ttl if ttl is None else ttl
+        entry = self._load(url)
+        now = time.time()
+        if entry and now - entry["fetched_at"] < ttl:
+            self._count("fresh")
+            return CachedResponse(url, 200, entry["headers"], entry["body"], "fresh")
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry:
+            if entry["headers"].get("ETag"):
+                headers["If-None-Match"] = entry["headers"]["ETag"]
+            if entry["headers"].get("Last-Modified"):
+                headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+        resp = request_with_retry(session, "GET", url, headers=headers, **kwargs)
+
+        if resp.status_code == 304 and entry:
+            entry["fetched_at"] = now
+            self._store(entry)
+            self._count("revalidated")
+            return CachedResponse(url, 200, entry["headers"], entry["body"], "revalidated")
+
+        self._count("network")
+        keep = {k: resp.headers[k] for k in ("ETag", "Last-Modified", "Content-Type") if k in resp.headers}
+        if resp.status_code == 200:
+            self._store({"url": url, "fetched_at": now, "headers": keep, "body": resp.text})
+        return CachedResponse(url, resp.status_code, keep, resp.text, "network")
+
+    def summary(self):
+        """이번 실행의 캐시 사용 통계 문자열 (로그용)"""
+        with self._lock:
+            s = dict(self.stats)
+        return f"캐시 적중 {s['fresh']}건 / 304 재검증 {s['revalidated']}건 / 네트워크 {s['network']}건"
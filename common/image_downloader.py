@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+백그라운드 이미지 다운로더 (스레드 풀 + keep-alive Session 공유).
+
+추출 코드는 submit(url, save_path)로 큐에 넣고 바로 다음 작업으로 넘어가며,
+워커 스레드들이 연결 풀을 재사용해 받아서 큰 청크로 저장합니다.
+저장은 작업마다 고유한 임시 파일에 쓴 뒤 replace하므로 중간에 끊기거나 같은 경로가 중복 예약돼도
+깨지거나 섞인 이미지 파일이 남지 않습니다.
+store(ImageStore)를 주면 이전 실행에서 받은 URL은 요청 없이 원본 하드링크만 만들고,
+새로 받은 파일도 원본 저장소에 한 번만 두고 save_path에는 하드링크를 겁니다.
+close() 시 남은 큐를 모두 처리하고 건수·용량·처리 속도(bytes/sec)를 집계합니다.
+"""
+import queue
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common.rate_limiter import request_with_retry
+
+DEFAULT_WORKERS = 8
+# 스트림 저장 청크 (기존 1KB → 256KB)
+CHUNK_SIZE = 256 * 1024
+# 대기 큐 최대 길이 (가득 차면 submit이 잠시 대기 → 메모리 제한)
+QUEUE_SIZE = 2000
+# Content-Type → 저장 확장자 (submit(detect_ext=True)일 때)
+CONTENT_TYPE_EXT = {
+    "image/jpeg": "jpg", "image/jpg": "jpg", "image/pjpeg": "jpg", "image/png": "png", "image/webp": "webp",
+    "image/gif": "gif", "image/avif": "avif", "image/bmp": "bmp",
+}
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+
+
+def ext_for_content_type(content_type, default="jpg"):
+    """'image/webp; charset=...' → 'webp' (모르는 형식이면 default)"""
+    mime = (content_type or "").split(";")[0].strip().lower()
+    return CONTENT_TYPE_EXT.get(mime, default)
+
+
+class ImageDownloader:
+    def __init__(self, workers=DEFAULT_WORKERS, headers=None, chunk_size=CHUNK_SIZE, queue_size=QUEUE_SIZE, store=None):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"User-Agent": USER_AGENT})
+        if headers:
+            self.session.headers.update(headers)
+        self.chunk_size = chunk_size
+        self.store = store
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self.n_saved = 0
+        self.n_failed = 0
+        self.n_bytes = 0
+        self.n_reused = 0
+        self._started = time.perf_counter()
+        self._finished = None
+        self._threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(workers)]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, url, save_path, detect_ext=False):
+        """
+        다운로드 예약 (즉시 반환). 저장 결과는 close()/summary()의 집계로 확인.
+        detect_ext=True 이면 save_path 확장자 대신 응답 Content-Type 기준 확장자로 저장
+        """
+        self._queue.put((url, Path(save_path), detect_ext))
+
+    def _fetch(self, url, save_path, detect_ext=False):
+        """받은 바이트 수 반환 (실패 0). store가 있으면 원본 저장소에 넣고 save_path는 하드링크"""
+        resp = request_with_retry(self.session, "GET", url, stream=True, timeout=15)
+        try:
+            if resp.status_code != 200:
+                return 0
+            if detect_ext:
+                ext = ext_for_content_type(resp.headers.get("Content-Type"), save_path.suffix.lstrip(".") or "jpg")
+                save_path = save_path.with_suffix("." + ext)
+            save_path.parent.mkdir(parents=True, exist_ok=True)
+            # 같은 save_path가 중복 예약(상세 재추출·재시도)돼도 스레드끼리 한 임시 파일을 같이 쓰지 않도록 작업별 이름
+            tmp_path = save_path.with_name(f"{save_path.name}.{uuid.uuid4().hex[:8]}.part")
+            try:
+                n = 0
+                with open(tmp_path, "wb") as f:
+                    for chunk in resp.iter_content(self.chunk_size):
+                        f.write(chunk)
+                        n += len(chunk)
+                if n == 0:
+                    return 0
+                if self.store is not None:
+                    obj = self.store.add_file(url, tmp_path, save_path.suffix.lstrip(".") or "jpg")
+                    self.store.link(obj, save_path)
+                else:
+                    tmp_path.replace(save_path)
+                return n
+            finally:
+                # 실패·빈 응답으로 남은 임시 파일 정리 (정상 저장 시에는 이미 이동됨)
+                tmp_path.unlink(missing_ok=True)
+        finally:
+            resp.close()
+
+    def _reuse(self, url, save_path, detect_ext=False):
+        """이전에 받은 URL이면 원본 하드링크만 만들고 True"""
+        if self.store is None:
+            return False
+        obj = self.store.lookup(url)
+        if obj is None:
+            return False
+        self.store.link(obj, save_path.with_suffix(obj.suffix) if detect_ext else save_path)
+        return True
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                try:
+                    if self._reuse(*job):
+                        with self._lock:
+                            self.n_reused += 1
+                        continue
+                    n = self._fetch(*job)
+                except Exception:
+                    n = 0
+                with self._lock:
+                    if n:
+                        self.n_saved += 1
+                        self.n_bytes += n
+                    else:
+                        self.n_failed += 1
+            finally:
+                self._queue.task_done()
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def close(self):
+        """남은 다운로드를 모두 끝내고 워커 종료"""
+        if self._finished is not None:
+            return
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join()
+        self._finished = time.perf_counter()
+        self.session.close()
+
+    def summary(self):
+        elapsed = (self._finished or time.perf_counter()) - self._started
+        rate = self.n_bytes / elapsed if elapsed > 0 else 0.0
+        return (f"이미지 {self.n_saved}장 저장, 재사용 {self.n_reused}장(요청 없음), 실패 {self.n_failed}장, "
+                f"{self.n_bytes / 1024 / 1024:.1f}MB "
+                f"({rate / 1024 / 1024:.2f}MB/s, {elapsed:.1f}초)")
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+내용 주소(content-addressed) 이미지 저장소 + URL→해시 인덱스.
+
+- 이미지 원본은 imgs/_objects/<해시 앞 2자리>/<sha256>.<ext> 에 한 번만 저장
+- 날짜별 폴더(imgs/heydealer/2026년/20260226/...)에는 원본 파일의 하드링크를 만듦
+  (하드링크가 안 되는 파일시스템이면 복사)
+- 한 번 받은 URL은 cache/image_index.sqlite3에 해시가 기록되어 다음 실행부터는 요청하지 않음
+  (원본이 다 기록된 뒤에만 인덱스에 남기고, 원본이 없어졌거나 크기가 맞지 않으면 lookup이 항목을 지워 다시 받음)
+
+같은 매물이 한 달 동안 올라와 있어도 CDN 요청·디스크 사용은 사실상 1회분입니다.
+"""
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+_ROOT = Path(__file__).resolve().parent.parent
+OBJECTS_DIR = _ROOT / "imgs" / "_objects"
+INDEX_PATH = _ROOT / "cache" / "image_index.sqlite3"
+
+
+def _sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ImageStore:
+    """여러 다운로드 스레드에서 같이 쓰도록 sqlite 연결 1개 + lock"""
+
+    def __init__(self, objects_dir=OBJECTS_DIR, index_path=INDEX_PATH):
+        self.objects_dir = Path(objects_dir)
+        self.index_path = Path(index_path)
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.index_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS image_urls ("
+            " url TEXT PRIMARY KEY, sha256 TEXT NOT NULL, ext TEXT NOT NULL, size INTEGER NOT NULL,"
+            " fetched_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def object_path(self, sha256, ext):
+        return self.objects_dir / sha256[:2] / f"{sha256}.{ext}"
+
+    def lookup(self, url):
+        """
+        이전에 받은 URL이고 원본 파일이 온전히 남아 있으면 원본 경로, 아니면 None.
+        원본이 없어졌거나 크기가 0·기록과 다르면 인덱스 항목을 지워 다음 다운로드에서 다시 받게 함
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT sha256, ext, size FROM image_urls WHERE url = ?", (url,)).fetchone()
+        if not row:
+            return None
+        sha256, ext, size = row
+        path = self.object_path(sha256, ext)
+        try:
+            actual = path.stat().st_size
+        except OSError:
+            actual = -1
+        if actual <= 0 or actual != size:
+            self.forget(url)
+            return None
+        return path
+
+    def forget(self, url):
+        """URL 인덱스 항목 삭제 (원본 파일은 다른 URL이 같이 쓸 수 있어 그대로 둠)"""
+        with self._lock:
+            self._conn.execute("DELETE FROM image_urls WHERE url = ?", (url,))
+            self._conn.commit()
+
+    def _place(self, tmp_path, obj, size):
+        """완성된 임시 파일을 원본 위치로 (이미 같은 해시의 온전한 원본이 있으면 임시 파일만 삭제)"""
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            existing = obj.stat().st_size
+        except OSError:
+            existing = -1
+        if existing == size:
+            tmp_path.unlink()
+        else:
+            tmp_path.replace(obj)
+
+    def _index(self, url, sha256, ext, size):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO image_urls (url, sha256, ext, size, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (url, sha256, ext, size, time.time()),
+            )
+            self._conn.commit()
+
+    def add_file(self, url, tmp_path, ext):
+        """
+        다 받은(작업별로 고유한) 임시 파일을 원본 저장소로 이동한 뒤에만 인덱스 기록. 원본 경로 반환.
+        빈 파일은 저장·기록하지 않고 ValueError
+        """
+        tmp_path = Path(tmp_path)
+        size = tmp_path.stat().st_size
+        if size == 0:
+            raise ValueError(f"빈 이미지 파일: {url}")
+        sha256 = _sha256_file(tmp_path)
+        obj = self.object_path(sha256, ext)
+        self._place(tmp_path, obj, size)
+        self._index(url, sha256, ext, size)
+        return obj
+
+    def add_bytes(self, url, data, ext):
+        """메모리의 이미지 바이트 저장 (page.request 등으로 받은 경우)"""
+        if not data:
+            raise ValueError(f"빈 이미지 데이터: {url}")
+        sha256 = hashlib.sha256(data).hexdigest()
+        obj = self.object_path(sha256, ext)
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        tmp = obj.with_name(obj.name + f".{threading.get_ident()}.part")
+        tmp.write_bytes(data)
+        self._place(tmp, obj, len(data))
+        self._index(url, sha256, ext, len(data))
+        return obj
+
+    @staticmethod
+    def link(obj_path, dest_path):
+        """날짜별 폴더에 원본 하드링크 생성 (이미 있으면 교체, 하드링크 불가 시 복사)"""
+        dest_path = Path(dest_path)
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        if dest_path.exists():
+            dest_path.unlink()
+        try:
+            os.link(obj_path, dest_path)
+        except OSError:
+            shutil.copyfile(obj_path, dest_path)
+        return dest_path
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+PostgreSQL 기반 분산 작업 큐 (crawl_jobs 테이블, 여러 서버의 워커가 나눠서 처리).
+
+- 작업 = (site, kind, dedupe_key, payload). kind 예: "list_shard"(차종별 목록), "detail"(상세 URL), "image"
+  같은 (site, kind, dedupe_key)는 한 번만 등록되므로 여러 서버가 같은 작업을 넣어도 중복되지 않음
+- claim: SELECT ... FOR UPDATE SKIP LOCKED 로 다른 워커가 잡은 행은 건너뛰고 가져가며, 리스(lease) 시간을 기록
+- heartbeat: 처리 중인 작업의 리스를 주기적으로 연장 (워커가 죽으면 리스가 만료되어 다른 워커가 다시 가져감)
+- fail: max_attempts 전까지는 지수 백오프 후 재시도, 넘으면 failed
+연결은 db_config.get_db_connection()을 autocommit으로 사용합니다 (문장 하나가 곧 트랜잭션).
+
+사용:
+    jobq = JobQueue()
+    jobq.ensure_schema()
+    jobq.enqueue_many("heydealer", "list_shard", [("20260226:SUV", {"car_type": "SUV"})])
+    run_worker(jobq, "heydealer", "list_shard", handler)   # handler(job) 예외 → 재시도
+"""
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from db_config import get_db_connection
+
+# 리스 시간(초): 이 시간 안에 heartbeat/complete가 없으면 다른 워커가 가져감
+LEASE_SECS = 120
+MAX_ATTEMPTS = 3
+# 재시도 대기: RETRY_BASE_SECS * 2^(시도-1)
+RETRY_BASE_SECS = 30
+# run_worker: 가져갈 작업이 없을 때 폴링 간격, 이 시간 동안 계속 없으면 종료
+POLL_SECS = 3
+IDLE_EXIT_SECS = 60
+
+Job = namedtuple("Job", "id site kind payload attempts max_attempts")
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS crawl_jobs (
+    id               bigserial   PRIMARY KEY,
+    site             text        NOT NULL,
+    kind             text        NOT NULL,
+    dedupe_key       text        NOT NULL,
+    payload          jsonb       NOT NULL,
+    status           text        NOT NULL DEFAULT 'pending',  -- pending / running / done / failed
+    attempts         integer     NOT NULL DEFAULT 0,
+    max_attempts     integer     NOT NULL DEFAULT 3,
+    available_at     timestamptz NOT NULL DEFAULT now(),
+    lease_owner      text,
+    lease_expires_at timestamptz,
+    last_error       text,
+    created_at       timestamptz NOT NULL DEFAULT now(),
+    updated_at       timestamptz NOT NULL DEFAULT now(),
+    UNIQUE (site, kind, dedupe_key)
+);
+CREATE INDEX IF NOT EXISTS crawl_jobs_pending ON crawl_jobs (site, kind, id) WHERE status = 'pending';
+CREATE INDEX IF NOT EXISTS crawl_jobs_running ON crawl_jobs (site, kind, lease_expires_at) WHERE status = 'running';
+"""
+
+_CLAIM_SQL = """
+WITH picked AS (
+    SELECT id FROM crawl_jobs
+    WHERE site = %(site)s AND kind = %(kind)s AND attempts < max_attempts
+      AND ((status = 'pending' AND available_at <= now())
+           OR (status = 'running' AND lease_expires_at < now()))
+    ORDER BY id
+    FOR UPDATE SKIP LOCKED
+    LIMIT %(limit)s
+)
+UPDATE crawl_jobs j
+SET status = 'running', attempts = j.attempts + 1, lease_owner = %(owner)s,
+    lease_expires_at = now() + make_interval(secs => %(lease)s), updated_at = now()
+FROM picked
+WHERE j.id = picked.id
+RETURNING j.id, j.site, j.kind, j.payload, j.attempts, j.max_attempts
+"""
+
+# 리스가 만료됐는데 시도 횟수를 다 쓴 작업 (워커가 처리 중 계속 죽은 경우) → failed
+_REAP_SQL = """
+UPDATE crawl_jobs
+SET status = 'failed', last_error = coalesce(last_error, 'lease expired'), lease_owner = NULL,
+    lease_expires_at = NULL, updated_at = now()
+WHERE site = %(site)s AND kind = %(kind)s AND status = 'running'
+  AND lease_expires_at < now() AND attempts >= max_attempts
+"""
+
+
+class JobQueue:
+    """연결 1개 + lock (heartbeat 스레드와 같이 씀). 워커 스레드마다 인스턴스 하나씩 만드는 것을 권장"""
+
+    def __init__(self, conn=None, worker_id=None, lease_secs=LEASE_SECS):
+        self.conn = conn or get_db_connection()
+        self.conn.autocommit = True
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.lease_secs = lease_secs
+        self._lock = threading.Lock()
+        self._held = set()
+        self._hb_stop = threading.Event()
+        self._hb_thread = None
+
+    def _execute(self, sql, params=None, fetch=False):
+        with self._lock:
+            with self.conn.cursor() as cur:
+                cur.execute(sql, params)
+                return cur.fetchall() if fetch else cur.rowcount
+
+    def ensure_schema(self):
+        self._execute(SCHEMA_SQL)
+
+    def enqueue(self, site, kind, payload, dedupe_key, max_attempts=MAX_ATTEMPTS):
+        """작업 1건 등록. 이미 있는 (site, kind, dedupe_key)면 무시하고 False"""
+        return self.enqueue_many(site, kind, [(dedupe_key, payload)], max_attempts) == 1
+
+    def enqueue_many(self, site, kind, items, max_attempts=MAX_ATTEMPTS):
+        """items: [(dedupe_key, payload dict), ...] 한 번에 등록. 새로 들어간 건수 반환"""
+        from psycopg2.extras import execute_values
+        rows = [(site, kind, str(key), json.dumps(payload, ensure_ascii=False), max_attempts) for key, payload in items]
+        if not rows:
+            return 0
+        with self._lock:
+            with self.conn.cursor() as cur:
+                inserted = execute_values(
+                    cur,
+                    "INSERT INTO crawl_jobs (site, kind, dedupe_key, payload, max_attempts) VALUES %s"
+                    " ON CONFLICT (site, kind, dedupe_key) DO NOTHING RETURNING id",
+                    rows, template="(%s, %s, %s, %s::jsonb, %s)", fetch=True,
+                )
+        return len(inserted)
+
+    def claim(self, site, kind, limit=1):
+        """가져갈 수 있는 작업을 최대 limit건 잡아 리스 설정 후 [Job] 반환 (없으면 [])"""
+        rows = self._execute(_CLAIM_SQL, {
+            "site": site, "kind": kind, "limit": limit, "owner": self.worker_id, "lease": self.lease_secs,
+        }, fetch=True)
+        if not rows:
+            self._execute(_REAP_SQL, {"site": site, "kind": kind})
+        jobs = [Job(*row) for row in rows]
+        self._held.update(job.id for job in jobs)
+        return jobs
+
+    def heartbeat(self):
+        """잡고 있는 작업들의 리스 연장. 연장된 건수 반환 (다른 워커에 넘어간 작업은 제외)"""
+        held = list(self._held)
+        if not held:
+            return 0
+        return self._execute(
+            "UPDATE crawl_jobs SET lease_expires_at = now() + make_interval(secs => %s), updated_at = now()"
+            " WHERE id = ANY(%s) AND lease_owner = %s AND status = 'running'",
+            (self.lease_secs, held, self.worker_id),
+        )
+
+    def start_heartbeat(self, interval=None):
+        """리스 1/3 주기로 heartbeat 하는 백그라운드 스레드 시작 (close() 때 종료)"""
+        if self._hb_thread is not None:
+            return
+        interval = interval or max(1, self.lease_secs // 3)
+
+        def _loop():
+            while not self._hb_stop.wait(interval):
+                try:
+                    self.heartbeat()
+                except Exception as e:
+                    print(f"   ⚠️ 작업 큐 heartbeat 실패 ({self.worker_id}): {str(e)[:80]}")
+
+        self._hb_thread = threading.Thread(target=_loop, daemon=True)
+        self._hb_thread.start()
+
+    def complete(self, job):
+        """완료 처리. 리스가 만료되어 다른 워커에 넘어간 작업이면 False"""
+        self._held.discard(job.id)
+        n = self._execute(
+            "UPDATE crawl_jobs SET status = 'done', lease_owner = NULL, lease_expires_at = NULL, updated_at = now()"
+            " WHERE id = %s AND lease_owner = %s AND status = 'running'",
+            (job.id, self.worker_id),
+        )
+        return n == 1
+
+    def fail(self, job, error):
+        """실패 처리: 시도 횟수가 남았으면 백오프 후 pending, 아니면 failed"""
+        self._held.discard(job.id)
+        backoff = RETRY_BASE_SECS * 2 ** max(0, job.attempts - 1)
+        n = self._execute(
+            "UPDATE crawl_jobs SET status = CASE WHEN attempts < max_attempts THEN 'pending' ELSE 'failed' END,"
+            " available_at = now() + make_interval(secs => %s), last_error = %s,"
+            " lease_owner = NULL, lease_expires_at = NULL, updated_at = now()"
+            " WHERE id = %s AND lease_owner = %s AND status = 'running'",
+            (backoff, str(error)[:500], job.id, self.worker_id),
+        )
+        return n == 1
+
+    def count_active(self, site, kind):
+        """아직 끝나지 않은(pending·running) 작업 수"""
+        rows = self._execute(
+            "SELECT count(*) FROM crawl_jobs WHERE site = %s AND kind = %s AND status IN ('pending', 'running')",
+            (site, kind), fetch=True,
+        )
+        return rows[0][0]
+
+    def stats(self, site, kind=None):
+        """{status: 건수}"""
+        sql = "SELECT status, count(*) FROM crawl_jobs WHERE site = %s"
+        params = [site]
+        if kind:
+            sql += " AND kind = %s"
+            params.append(kind)
+        return dict(self._execute(sql + " GROUP BY status", params, fetch=True))
+
+    def close(self):
+        self._hb_stop.set()
+        if self._hb_thread is not None:
+            self._hb_thread.join()
+        self.conn.close()
+
+
+def run_worker(jobq, site, kind, handler, keep_running=None, idle_exit_secs=IDLE_EXIT_SECS, poll_secs=POLL_SECS):
+    """
+    (site, kind) 작업을 하나씩 claim → handler(job) → complete, 예외면 fail(재시도 예약).
+    가져갈 작업이 없으면 poll_secs마다 다시 보고, keep_running()이 False인 채로 idle_exit_secs 동안 없으면 종료.
+    반환: (완료 건수, 실패 건수)
+    """
+    jobq.start_heartbeat()
+    n_done = n_failed = 0
+    idle_since = None
+    while True:
+        jobs = jobq.claim(site, kind)
+        if not jobs:
+            if keep_running is not None and keep_running():
+                idle_since = None
+            else:
+                idle_since = idle_since or time.monotonic()
+                if time.monotonic() - idle_since >= idle_exit_secs:
+                    break
+            time.sleep(poll_secs)
+            continue
+        idle_since = None
+        for job in jobs:
+            try:
+                handler(job)
+            except Exception as e:
+                jobq.fail(job, e)
+                n_failed += 1
+                print(f"   ⚠️ 작업 실패 [{kind} #{job.id}] ({job.attempts}/{job.max_attempts}회): {str(e)[:80]}")
+            else:
+                jobq.complete(job)
+                n_done += 1
+    return n_done, n_failed
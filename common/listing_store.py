@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+매물별 목록 지문(fingerprint) + 마지막 상세 행 저장소 (sqlite3, 실행 간 유지).
+
+상세 단계에서 매물 키(헤이딜러 model_cd, 리본카 product_id)의 목록 카드 값이 지난 실행과 같으면
+상세 페이지를 다시 열지 않고 저장된 상세 행을 그대로 다시 씁니다.
+가격·주행거리·상태 등 지문 대상 필드가 하나라도 바뀐 매물, 처음 보는 매물만 상세 수집 대상입니다.
+
+사용:
+    store = ListingStore()
+    fp = listing_fingerprint(list_row, HEYDEALER_FP_FIELDS)
+    cached = store.get("heydealer", model_cd, fp)     # 같으면 상세 행 dict, 아니면 None
+    store.put("heydealer", model_cd, fp, detail_row)  # 상세 수집 성공 후
+    store.close()
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+STORE_PATH = Path(__file__).resolve().parent.parent / "cache" / "listing_store.sqlite3"
+# put 몇 건마다 commit 할지 (종료 시 close()에서 나머지 commit)
+COMMIT_EVERY = 50
+
+# 사이트별 지문 대상 목록 필드 (순번·수집 시각 등 매 실행 바뀌는 값 제외)
+HEYDEALER_FP_FIELDS = ("model_name", "model_second_name", "grade_name", "year", "km", "sale_price")
+REBORNCAR_FP_FIELDS = (
+    "lp_car_name", "lp_car_trim", "release_dt", "car_navi", "car_seat",
+    "car_main_pay", "amtsel", "status", "copytext",
+)
+
+
+def listing_fingerprint(row, fields):
+    """row에서 fields 값만 뽑아 만든 sha1 (값은 str·strip 후 비교)"""
+    payload = json.dumps([str(row.get(f) or "").strip() for f in fields], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class ListingStore:
+    """여러 스레드(상세 워커·writer)에서 같이 쓸 수 있도록 연결 1개 + lock"""
+
+    def __init__(self, path=STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS listings ("
+            " site TEXT NOT NULL, listing_key TEXT NOT NULL, fingerprint TEXT NOT NULL,"
+            " detail_json TEXT NOT NULL, updated_at REAL NOT NULL,"
+            " PRIMARY KEY (site, listing_key))"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, site, key, fingerprint):
+        """지문이 같으면 저장된 상세 행(dict), 없거나 바뀌었으면 None"""
+        if not key:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint, detail_json FROM listings WHERE site = ? AND listing_key = ?", (site, str(key))
+            ).fetchone()
+            if row and row[0] == fingerprint:
+                self.hits += 1
+                return json.loads(row[1])
+            self.misses += 1
+            return None
+
+    def put(self, site, key, fingerprint, detail_row):
+        if not key:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO listings (site, listing_key, fingerprint, detail_json, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (site, str(key), fingerprint, json.dumps(detail_row, ensure_ascii=False), time.time()),
+            )
+            self._pending += 1
+            if self._pending >= COMMIT_EVERY:
+                self._conn.commit()
+                self._pending = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.commit()
+            self._conn.close()
+
+    def summary(self):
+        return f"지문 일치(상세 재사용) {self.hits}건 / 신규·변경 {self.misses}건"
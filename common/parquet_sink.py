@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+CSV와 같은 행을 타입이 지정된 Parquet(Arrow)로도 저장하는 선택 출력 (pyarrow 필요).
+
+- 스냅샷 날짜별 파티션: result/<사이트>/parquet/<이름>/date=YYYYMMDD/part.parquet
+  → pyarrow.dataset / pandas.read_parquet(디렉터리)로 한 달치를 한 번에 읽을 수 있음
+- 컬럼 타입: model_sn 정수, date_crtr_pnttm 날짜, create_dt 분 단위 시각,
+  brand_name·car_type·status 등 반복 값은 dictionary(범주형) 인코딩, 나머지는 문자열
+- ROW_GROUP_ROWS 행마다 row group 하나로 기록, close() 때 임시 파일(.part)을 교체하므로
+  중간에 끊긴 실행의 Parquet은 남지 않고 CSV만 남습니다.
+
+BufferedCsvWriter와 같은 writerow/checkpoint/close를 가지며, with_parquet()로 CSV writer와 묶어 씁니다.
+"""
+import threading
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+ROW_GROUP_ROWS = 5000
+
+# 반복 값이 많은 범주형 컬럼 (dictionary 인코딩)
+CATEGORY_COLUMNS = (
+    "brand_id", "brand_name", "brand_list", "car_type", "car_type_name", "status", "copytext",
+    "refund", "guarantee", "accident", "gear_box", "car_color", "car_fuel", "car_navi", "car_seat",
+)
+INT_COLUMNS = ("model_sn",)
+DATE_COLUMNS = {"date_crtr_pnttm": "%Y%m%d"}
+TIMESTAMP_COLUMNS = {"create_dt": "%Y%m%d%H%M"}
+
+
+def _field(name):
+    if name in INT_COLUMNS:
+        return pa.field(name, pa.int64())
+    if name in DATE_COLUMNS:
+        return pa.field(name, pa.date32())
+    if name in TIMESTAMP_COLUMNS:
+        return pa.field(name, pa.timestamp("s"))
+    if name in CATEGORY_COLUMNS:
+        return pa.field(name, pa.dictionary(pa.int32(), pa.string()))
+    return pa.field(name, pa.string())
+
+
+def build_schema(fieldnames):
+    return pa.schema([_field(name) for name in fieldnames])
+
+
+def _convert(name, value):
+    """CSV 문자열 값 → 컬럼 타입 값 (빈 값·'-'·형식 불일치는 None)"""
+    if value is None:
+        return None
+    text = str(value).strip()
+    if name in INT_COLUMNS:
+        return int(text) if text.isdigit() else None
+    if name in DATE_COLUMNS or name in TIMESTAMP_COLUMNS:
+        fmt = DATE_COLUMNS.get(name) or TIMESTAMP_COLUMNS[name]
+        try:
+            parsed = datetime.strptime(text, fmt)
+        except ValueError:
+            return None
+        return parsed.date() if name in DATE_COLUMNS else parsed
+    return text if text not in ("", "-") else None
+
+
+class ParquetSink:
+    """여러 스레드에서 writerow 해도 되도록 lock 1개 (row group 단위로 묶어서 기록)"""
+
+    def __init__(self, path, fieldnames, row_group_rows=ROW_GROUP_ROWS):
+        if pa is None:
+            raise RuntimeError("pyarrow가 설치되어 있지 않아 Parquet 출력을 사용할 수 없습니다. (pip install pyarrow)")
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fieldnames = list(fieldnames)
+        self.schema = build_schema(self.fieldnames)
+        self.row_group_rows = row_group_rows
+        self._tmp_path = self.path.with_name(self.path.name + ".part")
+        self._writer = pq.ParquetWriter(str(self._tmp_path), self.schema, compression="zstd")
+        self._buf = {name: [] for name in self.fieldnames}
+        self._n_buf = 0
+        self._lock = threading.Lock()
+        self.n_rows = 0
+
+    def writerow(self, row):
+        with self._lock:
+            for name in self.fieldnames:
+                self._buf[name].append(_convert(name, row.get(name)))
+            self._n_buf += 1
+            self.n_rows += 1
+            if self._n_buf >= self.row_group_rows:
+                self._flush_locked()
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    def _flush_locked(self):
+        if not self._n_buf:
+            return
+        table = pa.Table.from_pydict(
+            {name: pa.array(values, type=self.schema.field(name).type) for name, values in self._buf.items()},
+            schema=self.schema,
+        )
+        self._writer.write_table(table, row_group_size=self._n_buf)
+        self._buf = {name: [] for name in self.fieldnames}
+        self._n_buf = 0
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def checkpoint(self):
+        """모인 행을 row group으로 기록 (Parquet 파일은 close() 후에만 읽을 수 있음)"""
+        self.flush()
+
+    def close(self):
+        with self._lock:
+            if self._writer is None:
+                return
+            self._flush_locked()
+            self._writer.close()
+            self._writer = None
+            self._tmp_path.replace(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TeeWriter:
+    """CSV writer + Parquet sink에 같은 행을 기록 (fieldnames는 첫 writer 기준)"""
+
+    def __init__(self, *writers):
+        self.writers = writers
+        self.fieldnames = writers[0].fieldnames
+
+    def writerow(self, row):
+        for w in self.writers:
+            w.writerow(row)
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    def checkpoint(self):
+        for w in self.writers:
+            w.checkpoint()
+
+    def close(self):
+        """모든 writer를 닫음 — 하나가 실패해도 나머지는 닫고, 첫 번째 오류를 다시 올림"""
+        first_error = None
+        for w in self.writers:
+            try:
+                w.close()
+            except Exception as e:
+                if first_error is None:
+                    first_error = e
+        if first_error is not None:
+            raise first_error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def snapshot_path(result_dir, name, date_str):
+    """result/<사이트>/parquet/<name>/date=YYYYMMDD/part.parquet"""
+    return Path(result_dir) / "parquet" / name / f"date={date_str}" / "part.parquet"
+
+
+def with_parquet(csv_writer, result_dir, name, enabled=True, date_str=None):
+    """
+    enabled이고 pyarrow가 있으면 CSV writer와 오늘 날짜 Parquet sink를 묶은 TeeWriter, 아니면 csv_writer 그대로.
+    name: 파일 이름 기준 (예: "heydealer_list")
+    """
+    if not enabled:
+        return csv_writer
+    if pa is None:
+        print("   ⚠️ pyarrow 미설치: Parquet 출력 없이 CSV만 저장합니다. (pip install pyarrow)")
+        return csv_writer
+    date_str = date_str or datetime.now().strftime("%Y%m%d")
+    sink = ParquetSink(snapshot_path(result_dir, name, date_str), csv_writer.fieldnames)
+    return TeeWriter(csv_writer, sink)
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+결과 CSV(list/detail/brand)를 PostgreSQL 스냅샷 테이블로 대량 적재 (COPY FROM STDIN).
+
+- 행 단위 INSERT 대신 BATCH_ROWS 행씩 메모리 CSV로 묶어 임시 staging 테이블에 COPY
+- 파일 하나를 다 올리면 staging → 스냅샷 테이블로 한 번에 병합 (INSERT ... ON CONFLICT DO UPDATE)
+- 스냅샷 키: (site, listing_key, date_crtr_pnttm)
+    listing_key = 헤이딜러 model_cd / 리본카 product_id (brand는 헤이딜러 model_id, 리본카 brand|car|model)
+- 같은 날 다시 적재하면 그날 스냅샷만 덮어쓰고, 날짜가 다르면 새 스냅샷으로 쌓임
+- 원본 행 전체는 data(jsonb)에, 자주 거르는 값(brand_name·car_type·status)은 list 테이블 컬럼으로도 저장
+연결은 db_config.get_db_connection()을 사용합니다.
+
+사용:
+    python common/pg_loader.py                                            # result/ 아래 6개 파일
+    python common/pg_loader.py heydealer list result/heydealer/heydealer_list.csv
+"""
+import csv
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+# 프로젝트 루트의 db_config 사용
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from db_config import get_db_connection
+
+RESULT_DIR = Path(__file__).resolve().parent.parent / "result"
+# COPY 한 번에 보내는 행 수
+BATCH_ROWS = 50_000
+
+# (site, kind) → 키 컬럼·기준일 컬럼 (brand CSV는 헤이딜러가 data_crtr_pnttm)
+SOURCES = {
+    ("heydealer", "list"): {"key": ("model_cd",), "date": "date_crtr_pnttm"},
+    ("heydealer", "detail"): {"key": ("model_cd",), "date": "date_crtr_pnttm"},
+    ("heydealer", "brand"): {"key": ("model_id",), "date": "data_crtr_pnttm"},
+    ("reborncar", "list"): {"key": ("product_id",), "date": "date_crtr_pnttm"},
+    ("reborncar", "detail"): {"key": ("product_id",), "date": "date_crtr_pnttm"},
+    ("reborncar", "brand"): {"key": ("brand_list", "car_list", "model_list"), "date": "date_crtr_pnttm"},
+}
+
+DEFAULT_FILES = [
+    ("heydealer", "brand", RESULT_DIR / "heydealer" / "heydealer_brand_list.csv"),
+    ("heydealer", "list", RESULT_DIR / "heydealer" / "heydealer_list.csv"),
+    ("heydealer", "detail", RESULT_DIR / "heydealer" / "heydealer_detail.csv"),
+    ("reborncar", "brand", RESULT_DIR / "reborncar" / "reborncar_brand_list.csv"),
+    ("reborncar", "list", RESULT_DIR / "reborncar" / "reborncar_list.csv"),
+    ("reborncar", "detail", RESULT_DIR / "reborncar" / "reborncar_detail.csv"),
+]
+
+# kind → 스냅샷 테이블, 공통 컬럼 뒤에 붙는 추가 컬럼 (list만: 사이트별 원본 컬럼 후보)
+TABLES = {"list": "car_list_snapshot", "detail": "car_detail_snapshot", "brand": "car_brand_snapshot"}
+LIST_EXTRA = {
+    "brand_name": ("brand_name", "brand_list"),
+    "car_type": ("car_type", "car_type_name"),
+    "status": ("status",),
+}
+
+_BASE_COLUMNS = ["site", "listing_key", "date_crtr_pnttm", "model_sn", "create_dt", "data"]
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS car_list_snapshot (
+    site            text        NOT NULL,
+    listing_key     text        NOT NULL,
+    date_crtr_pnttm date        NOT NULL,
+    model_sn        integer,
+    create_dt       timestamp,
+    data            jsonb       NOT NULL,
+    brand_name      text,
+    car_type        text,
+    status          text,
+    loaded_at       timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (site, listing_key, date_crtr_pnttm)
+);
+CREATE TABLE IF NOT EXISTS car_detail_snapshot (
+    site            text        NOT NULL,
+    listing_key     text        NOT NULL,
+    date_crtr_pnttm date        NOT NULL,
+    model_sn        integer,
+    create_dt       timestamp,
+    data            jsonb       NOT NULL,
+    loaded_at       timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (site, listing_key, date_crtr_pnttm)
+);
+CREATE TABLE IF NOT EXISTS car_brand_snapshot (
+    site            text        NOT NULL,
+    listing_key     text        NOT NULL,
+    date_crtr_pnttm date        NOT NULL,
+    model_sn        integer,
+    create_dt       timestamp,
+    data            jsonb       NOT NULL,
+    loaded_at       timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (site, listing_key, date_crtr_pnttm)
+);
+-- 기간 조회 (날짜 순으로 쌓이므로 BRIN이 작고 빠름) + 사이트·날짜 조회
+CREATE INDEX IF NOT EXISTS car_list_snapshot_date_brin ON car_list_snapshot USING brin (date_crtr_pnttm);
+CREATE INDEX IF NOT EXISTS car_list_snapshot_site_date ON car_list_snapshot (site, date_crtr_pnttm);
+CREATE INDEX IF NOT EXISTS car_list_snapshot_brand_date ON car_list_snapshot (site, brand_name, date_crtr_pnttm);
+CREATE INDEX IF NOT EXISTS car_detail_snapshot_date_brin ON car_detail_snapshot USING brin (date_crtr_pnttm);
+CREATE INDEX IF NOT EXISTS car_detail_snapshot_site_date ON car_detail_snapshot (site, date_crtr_pnttm);
+CREATE INDEX IF NOT EXISTS car_brand_snapshot_site_date ON car_brand_snapshot (site, date_crtr_pnttm);
+-- 매물별 시계열(site, listing_key, date)은 기본키 인덱스로 조회
+"""
+
+
+def ensure_schema(conn):
+    with conn.cursor() as cur:
+        cur.execute(SCHEMA_SQL)
+    conn.commit()
+
+
+def _columns(kind):
+    return _BASE_COLUMNS + (list(LIST_EXTRA) if kind == "list" else [])
+
+
+def _fmt_date(text):
+    """'20260226' → '2026-02-26' (형식이 다르면 '')"""
+    text = str(text or "").strip()
+    return f"{text[:4]}-{text[4:6]}-{text[6:8]}" if len(text) == 8 and text.isdigit() else ""
+
+
+def _fmt_ts(text):
+    """'202602261530' → '2026-02-26 15:30' (형식이 다르면 '' → NULL)"""
+    text = str(text or "").strip()
+    if len(text) == 12 and text.isdigit():
+        return f"{text[:4]}-{text[4:6]}-{text[6:8]} {text[8:10]}:{text[10:12]}"
+    return ""
+
+
+def _to_record(site, kind, row):
+    """CSV 행 → staging 행 (키·기준일이 없으면 None)"""
+    source = SOURCES[(site, kind)]
+    key = "|".join(str(row.get(k) or "").strip() for k in source["key"]).strip("|")
+    date = _fmt_date(row.get(source["date"]))
+    if not key or not date:
+        return None
+    sn = str(row.get("model_sn") or "").strip()
+    record = [
+        site, key, date, sn if sn.isdigit() else "", _fmt_ts(row.get("create_dt")),
+        json.dumps(row, ensure_ascii=False),
+    ]
+    if kind == "list":
+        for candidates in LIST_EXTRA.values():
+            record.append(next((str(row[c]).strip() for c in candidates if str(row.get(c) or "").strip()), ""))
+    return record
+
+
+def _copy_batch(cur, staging, columns, records):
+    buf = io.StringIO()
+    csv.writer(buf).writerows(records)
+    buf.seek(0)
+    # FORMAT csv: 따옴표 없는 빈 값은 NULL
+    cur.copy_expert(f"COPY {staging} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf)
+
+
+def load_rows(conn, site, kind, rows, batch_rows=BATCH_ROWS):
+    """
+    rows(dict 반복자)를 staging에 BATCH_ROWS 행씩 COPY한 뒤 스냅샷 테이블로 병합하고 commit.
+    반환: (COPY 행 수, 병합 행 수, 키·기준일 없어 건너뛴 행 수)
+    """
+    table = TABLES[kind]
+    staging = f"stg_{table}"
+    columns = _columns(kind)
+    n_copied = n_skipped = 0
+    with conn.cursor() as cur:
+        # 세션 전용 임시 테이블 → 여러 적재가 동시에 돌아도 staging이 섞이지 않음
+        cur.execute(f"CREATE TEMP TABLE {staging} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP")
+        batch = []
+        for row in rows:
+            record = _to_record(site, kind, row)
+            if record is None:
+                n_skipped += 1
+                continue
+            batch.append(record)
+            if len(batch) >= batch_rows:
+                _copy_batch(cur, staging, columns, batch)
+                n_copied += len(batch)
+                batch = []
+        if batch:
+            _copy_batch(cur, staging, columns, batch)
+            n_copied += len(batch)
+
+        # 같은 키가 파일 안에 여러 번 있으면 마지막 수집 시각 행만 병합
+        keys = "site, listing_key, date_crtr_pnttm"
+        col_list = ", ".join(columns)
+        updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns[3:]) + ", loaded_at = now()"
+        cur.execute(
+            f"INSERT INTO {table} ({col_list})"
+            f" SELECT DISTINCT ON ({keys}) {col_list} FROM {staging}"
+            f" ORDER BY {keys}, create_dt DESC NULLS LAST"
+            f" ON CONFLICT ({keys}) DO UPDATE SET {updates}"
+        )
+        n_merged = cur.rowcount
+    conn.commit()
+    return n_copied, n_merged, n_skipped
+
+
+def load_csv(conn, site, kind, path, batch_rows=BATCH_ROWS):
+    """결과 CSV 하나를 스트리밍으로 읽어 load_rows (파일 전체를 메모리에 올리지 않음)"""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return load_rows(conn, site, kind, csv.DictReader(f), batch_rows)
+
+
+def main(files):
+    conn = get_db_connection()
+    try:
+        ensure_schema(conn)
+        for site, kind, path in files:
+            path = Path(path)
+            if not path.exists():
+                print(f"⏭️ 파일 없음: {path}")
+                continue
+            t0 = time.perf_counter()
+            try:
+                n_copied, n_merged, n_skipped = load_csv(conn, site, kind, path)
+            except Exception as e:
+                conn.rollback()
+                print(f"❌ {site}/{kind} 적재 실패 ({path.name}): {e}")
+                continue
+            elapsed = time.perf_counter() - t0
+            rate = n_copied / elapsed if elapsed > 0 else 0.0
+            print(f"✅ {site}/{kind}: COPY {n_copied:,}행 → {TABLES[kind]} 병합 {n_merged:,}행"
+                  f" (건너뜀 {n_skipped:,}, {elapsed:.1f}초, {rate:,.0f}행/초)")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args and len(args) % 3 != 0:
+        sys.exit("사용법: python common/pg_loader.py [site kind csv_path ...]")
+    main([tuple(args[i:i + 3]) for i in range(0, len(args), 3)] if args else DEFAULT_FILES)
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+호스트별 요청 속도 제한(토큰 버킷) + 재시도/백오프.
+
+- car_meta API, 이미지 CDN, 페이지 이동(page.goto) 모두 get_limiter()의 같은 인스턴스를 거칩니다.
+- 429/5xx 응답은 Retry-After(초 또는 HTTP-date)를 우선 따르고, 없으면 지터가 들어간 지수 백오프로 재시도합니다.
+- 버킷 속도는 적응형(AIMD): 연속 성공 시 조금씩 올리고(max_rate까지), 429/503을 받으면 절반으로 내립니다.
+"""
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# 호스트별 (초기 초당 요청 수, 최대 초당 요청 수). 목록에 없는 호스트는 DEFAULT_RATE 사용
+HOST_RATES = {
+    "api.heydealer.com": (8.0, 20.0),
+    "www.heydealer.com": (2.0, 4.0),
+    "www.reborncar.co.kr": (2.0, 4.0),
+}
+DEFAULT_RATE = (5.0, 10.0)
+MIN_RATE = 0.2
+
+# 재시도 대상 상태 코드
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# 속도를 낮추는 상태 코드 (서버가 과부하를 알려온 경우)
+THROTTLE_STATUSES = (429, 503)
+
+
+class TokenBucket:
+    """스레드 안전 토큰 버킷. rate(초당 토큰)를 success()/throttle()로 조절."""
+
+    def __init__(self, rate, max_rate, burst=None, increase_every=20, increase_step=0.5):
+        self.rate = float(rate)
+        self.max_rate = float(max_rate)
+        self.capacity = float(burst or max(1.0, rate))
+        self.increase_every = increase_every
+        self.increase_step = increase_step
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._blocked_until = 0.0
+        self._success_streak = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, tokens=1.0):
+        """토큰이 생길 때까지 대기. 대기한 시간(초) 반환."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                wait = max(self._blocked_until - now, (tokens - self._tokens) / self.rate)
+            time.sleep(wait)
+            waited += wait
+
+    def success(self):
+        """연속 성공이 increase_every번 쌓이면 속도를 increase_step만큼 올림 (additive increase)"""
+        with self._lock:
+            self._success_streak += 1
+            if self._success_streak >= self.increase_every and self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+                self.capacity = max(self.capacity, self.rate)
+                self._success_streak = 0
+
+    def throttle(self, pause=0.0):
+        """속도 절반으로 감소 (multiplicative decrease), pause초 동안 해당 호스트 전체 요청 중지"""
+        with self._lock:
+            self._success_streak = 0
+            self.rate = max(MIN_RATE, self.rate / 2)
+            if pause > 0:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + pause)
+
+
+class HostRateLimiter:
+    """호스트 이름별 TokenBucket 묶음"""
+
+    def __init__(self, host_rates=None, default_rate=DEFAULT_RATE):
+        self.host_rates = dict(HOST_RATES if host_rates is None else host_rates)
+        self.default_rate = default_rate
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url_or_host):
+        host = urlparse(url_or_host).netloc if "://" in url_or_host else url_or_host
+        with self._lock:
+            b = self._buckets.get(host)
+            if b is None:
+                rate, max_rate = self.host_rates.get(host, self.default_rate)
+                b = self._buckets[host] = TokenBucket(rate, max_rate)
+            return b
+
+    def acquire(self, url):
+        return self.bucket(url).acquire()
+
+    def success(self, url):
+        self.bucket(url).success()
+
+    def throttle(self, url, pause=0.0):
+        self.bucket(url).throttle(pause)
+
+    def rates(self):
+        """현재 호스트별 속도 (로그 출력용)"""
+        with self._lock:
+            return {h: round(b.rate, 2) for h, b in self._buckets.items()}
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    """프로세스 전체에서 공유하는 HostRateLimiter"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = HostRateLimiter()
+        return _limiter
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0):
+    """지수 백오프 + 지터: d = min(cap, base * 2^attempt) 일 때 d/2 ~ d 사이 임의 값"""
+    d = min(cap, base * (2 ** attempt))
+    return d / 2 + random.uniform(0, d / 2)
+
+
+def parse_retry_after(value):
+    """Retry-After 헤더(초 또는 HTTP-date)를 초 단위로 변환. 해석 불가 시 None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        dt = parsedate_to_datetime(value)
+        return max(0.0, dt.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def request_with_retry(session, method, url, limiter=None, max_retries=4, backoff_base=0.5, backoff_cap=30.0, **kwargs):
+    """
+    limiter를 거쳐 session.request 호출. 429/5xx·연결 오류는 재시도.
+    재시도를 다 써도 실패하면 마지막 응답을 그대로 반환(연결 오류는 예외 전파) — 상태 코드 처리는 호출 측에서.
+    """
+    limiter = limiter or get_limiter()
+    for attempt in range(max_retries + 1):
+        limiter.acquire(url)
+        try:
+            resp = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= max_retries:
+                raise
+            delay = backoff_delay(attempt, backoff_base, backoff_cap)
+            logger.warning(f"요청 오류, {delay:.1f}s 후 재시도 ({attempt + 1}/{max_retries}): {url} ({e})")
+            time.sleep(delay)
+            continue
+
+        if resp.status_code not in RETRY_STATUSES:
+            limiter.success(url)
+            return resp
+        if attempt >= max_retries:
+            return resp
+
+        retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+        delay = retry_after if retry_after is not None else backoff_delay(attempt, backoff_base, backoff_cap)
+        if resp.status_code in THROTTLE_STATUSES:
+            limiter.throttle(url, pause=delay)
+        logger.warning(f"HTTP {resp.status_code}, {delay:.1f}s 후 재시도 ({attempt + 1}/{max_retries}): {url}")
+        resp.close()
+        time.sleep(delay)
+    return resp
+
+
+def wait_before_retry(attempt, url=None, limiter=None, base=1.0, cap=30.0):
+    """page.goto 등 HTTP 응답을 직접 보지 못하는 재시도용: 백오프 대기 후 해당 호스트 속도도 낮춤"""
+    if url:
+        (limiter or get_limiter()).throttle(url)
+    time.sleep(backoff_delay(attempt, base, cap))
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+상세 페이지 레이지 로딩용 스크롤 드라이버 (헤이딜러·리본카 공용).
+
+고정 픽셀·고정 sleep 스크롤 루프 대신:
+- 뷰포트 높이만큼씩 document.body.scrollHeight(또는 root 요소 끝)까지 내려가며
+- 단계마다 화면 안 이미지가 모두 complete이고 문서 높이가 멈출 때까지만 기다리고 (단계당 최대 step_timeout_ms)
+- sections 선택자가 모두 나타나고 화면까지 내려온 뒤에는 그 자리에서 종료합니다.
+스크롤 중 높이가 늘어나면(무한 로딩·지연 섹션) 늘어난 끝까지 따라갑니다. 전체가 page.evaluate 1회입니다.
+
+이미지 차단 프로필(resource_blocker)에서도 중단된 이미지는 complete=true가 되므로 대기하지 않습니다.
+"""
+
+_DRIVE_JS = """
+async (opt) => {
+    const sleep = (ms) => new Promise((r) => setTimeout(r, ms));
+    const root = opt.root ? document.querySelector(opt.root) : null;
+    if (opt.root && !root) return {steps: 0, height: document.body.scrollHeight, found: false, pending: 0};
+    const range = () => {
+        if (!root) return [0, document.body.scrollHeight];
+        const r = root.getBoundingClientRect();
+        return [Math.max(0, r.top + window.scrollY - 100), r.bottom + window.scrollY];
+    };
+    // 추적 섹션이 모두 존재하고, 각 섹션의 마지막 요소까지 화면에 들어온 적이 있으면(위쪽에 있으면) 완료
+    const sectionsReady = () => opt.sections.length > 0 && opt.sections.every((s) => {
+        const els = document.querySelectorAll(s);
+        return els.length > 0 && els[els.length - 1].getBoundingClientRect().top <= window.innerHeight;
+    });
+    const pendingImgs = () => {
+        let n = 0;
+        const scope = root || document;
+        for (const img of scope.querySelectorAll("img")) {
+            if (img.complete) continue;
+            const b = img.getBoundingClientRect();
+            if (b.bottom >= 0 && b.top <= window.innerHeight) n++;
+        }
+        return n;
+    };
+    const step = Math.max(200, window.innerHeight - 100);
+    let [y, end] = range();
+    let steps = 0;
+    while (y <= end && steps < opt.maxSteps) {
+        window.scrollTo(0, y);
+        steps++;
+        const t0 = Date.now();
+        let lastH = document.body.scrollHeight;
+        while (Date.now() - t0 < opt.stepTimeoutMs) {
+            await sleep(opt.pollMs);
+            const h = document.body.scrollHeight;
+            if (pendingImgs() === 0 && h === lastH) break;
+            lastH = h;
+        }
+        if (sectionsReady()) break;
+        y += step;
+        end = range()[1];
+    }
+    const pending = pendingImgs();
+    if (opt.restoreTop) window.scrollTo(0, 0);
+    return {steps: steps, height: document.body.scrollHeight, found: sectionsReady(), pending: pending};
+}
+"""
+
+
+def drive_lazy_load(page, sections=(), root=None, step_timeout_ms=1500, poll_ms=100, max_steps=40, restore_top=True):
+    """
+    page를 뷰포트 단위로 끝까지(또는 sections가 모두 나타날 때까지) 스크롤하며 레이지 로딩 완료를 기다림.
+    root: 이 선택자 요소 구간만 훑기 (예: 리본카 '.vip-section .vip-visual'). 없으면 문서 전체.
+    반환: {"steps": 스크롤 단계 수, "height": 최종 문서 높이, "found": sections 모두 있음, "pending": 미완료 이미지 수}
+    """
+    try:
+        return page.evaluate(_DRIVE_JS, {
+            "sections": list(sections), "root": root, "stepTimeoutMs": step_timeout_ms,
+            "pollMs": poll_ms, "maxSteps": max_steps, "restoreTop": restore_top,
+        })
+    except Exception:
+        # 스크롤 중 페이지 이동 등: 호출부는 기존처럼 셀렉터 대기로 이어감
+        return {"steps": 0, "height": 0, "found": False, "pending": 0}
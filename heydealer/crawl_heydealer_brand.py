@@ -1,10 +1,20 @@
-import time
 import pandas as pd
 import logging
-import requests
+import sys
 from datetime import datetime
 from pathlib import Path
 
+# 프로젝트 루트의 공용 모듈(common/) 사용
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from heydealer_car_meta import (
+    API_BASE, BRAND_CSV_FIELDS, MAX_WORKERS, create_cache, create_session, fetch_brand_snapshot,
+    refresh_brand_hierarchy, save_delta_csv, save_snapshot_state,
+)
+
+# 실행 모드: True면 이전 heydealer_brand_list.csv 대비 바뀐 모델그룹만 재수집 + delta CSV 저장
+#           (이전 CSV가 없으면 전체 수집). False면 항상 전체 수집
+REFRESH_MODE = True
+
 # --- 로깅 및 경로 설정 ---
 BASE_DIR = Path(__file__).resolve().parent
 
@@ -25,15 +35,14 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class HeyDealerBrandCrawler:
-    def __init__(self):
-        self.api_base = "https://api.heydealer.com/v2/customers/web/market/car_meta"
+    def __init__(self, max_workers=MAX_WORKERS, use_cache=True):
+        self.api_base = API_BASE
         self.brand_file = RESULT_DIR / "heydealer_brand_list.csv"
-        
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
-            "Accept": "application/json",
-        })
+        # /brands/{id}/, /model_groups/{id}/ 동시 요청 상한
+        self.max_workers = max_workers
+        self.session = create_session(max_workers)
+        # 응답 디스크 캐시 (cache/heydealer_car_meta). False면 매번 전체 재호출
+        self.cache = create_cache() if use_cache else None
 
     def get_now_times(self):
         """요청하신 형식의 날짜 데이터 생성"""
@@ -44,82 +53,30 @@ class HeyDealerBrandCrawler:
         creat_de = now.strftime("%Y%m%d%H%M")
         return data_crtr_pnttm, creat_de
 
+    def _save_rows(self, all_data):
+        """brand CSV 저장 (컬럼 순서 지정, 날짜 정보를 끝에 배치)"""
+        df = pd.DataFrame(all_data)
+        df = df[BRAND_CSV_FIELDS]
+        df.to_csv(self.brand_file, index=False, encoding="utf-8-sig")
+        return len(df)
+
     def fetch_hierarchy(self):
-        """3단계 API 구조 탐색 및 날짜 정보 포함 수집"""
+        """3단계 API 구조 탐색 및 날짜 정보 포함 수집 (브랜드·모델그룹 API는 병렬 호출)"""
         logger.info("=" * 60)
         logger.info("헤이딜러 브랜드-모델 계층 데이터 수집 시작 (날짜 정보 포함)")
         logger.info("=" * 60)
         
-        all_data = []
-        # 수집 시점의 날짜 생성
-        d_pnttm, c_dt = self.get_now_times()
-        
         try:
-            # [Step 1] 전체 브랜드 목록 호출
-            brands_resp = self.session.get(f"{self.api_base}/brands/", timeout=10)
-            brands_resp.raise_for_status()
-            brands = brands_resp.json()
-            
-            logger.info(f"총 {len(brands)}개 브랜드 데이터 수집 시작")
-
-            for b_idx, brand in enumerate(brands, 1):
-                brand_id = brand.get('hash_id')
-                brand_name = brand.get('name')
-                
-                logger.info(f"[{b_idx}/{len(brands)}] 브랜드 처리 중: {brand_name}")
-
-                # [Step 2] 브랜드별 모델 그룹 호출
-                mg_resp = self.session.get(f"{self.api_base}/brands/{brand_id}/", timeout=10)
-                if mg_resp.status_code != 200: continue
-                
-                model_groups = mg_resp.json().get('model_groups', [])
-
-                for mg in model_groups:
-                    mg_id = mg.get('hash_id')
-                    mg_name = mg.get('name')
-
-                    # [Step 3] 모델 그룹별 세부 모델 호출
-                    sub_resp = self.session.get(f"{self.api_base}/model_groups/{mg_id}/", timeout=10)
-                    if sub_resp.status_code != 200: continue
-                    
-                    models = sub_resp.json().get('models', [])
-
-                    for model in models:
-                        # 최종 데이터 적재 (날짜 정보 추가)
-                        all_data.append({
-                            "brand_id": brand_id,
-                            "brand_name": brand_name,
-                            "model_group_id": mg_id,
-                            "model_group_name": mg_name,
-                            "model_id": model.get('hash_id'),
-                            "model_name": model.get('name'),
-                            # "model_count": model.get('count', 0),
-                            "production_period": model.get('period', ''),
-                            "data_crtr_pnttm": d_pnttm, # 8자리 날짜
-                            "create_dt": c_dt            # 12자리 날짜 (creat_de 매칭)
-                        })
-                
-                # API 서버 부하 방지
-                time.sleep(0.1)
+            all_data, state = fetch_brand_snapshot(self.session, logger, max_workers=self.max_workers, cache=self.cache)
 
-            # --- 결과 저장 ---
+            # --- 결과 저장 --- (state도 같이 저장해 다음 증분 갱신의 기준으로 사용)
             if all_data:
-                df = pd.DataFrame(all_data)
-                # 컬럼 순서 지정 (날짜 정보를 끝에 배치)
-                column_order = [
-                    "brand_id", "brand_name", 
-                    "model_group_id", "model_group_name", 
-                    "model_id", "model_name", 
-                    # "model_count", 
-                    "production_period",
-                    "data_crtr_pnttm", "create_dt"
-                ]
-                df = df[column_order]
-                df.to_csv(self.brand_file, index=False, encoding="utf-8-sig")
+                n_rows = self._save_rows(all_data)
+                save_snapshot_state(self.brand_file, state)
                 
                 logger.info("=" * 60)
                 logger.info(f"✅ 수집 완료! 파일: {self.brand_file}")
-                logger.info(f"총 수집 모델 수: {len(df):,}개")
+                logger.info(f"총 수집 모델 수: {n_rows:,}개")
                 logger.info("=" * 60)
             else:
                 logger.warning("⚠️ 수집된 데이터가 없습니다.")
@@ -127,6 +84,37 @@ class HeyDealerBrandCrawler:
         except Exception as e:
             logger.error(f"❌ 크롤링 중 치명적 오류: {e}")
 
+    def refresh(self):
+        """이전 brand CSV 대비 증분 갱신. 전체 CSV는 덮어쓰고, 추가·삭제·이름변경 모델은 heydealer_brand_delta.csv로 저장"""
+        if not self.brand_file.exists():
+            logger.info(f"이전 파일이 없어 전체 수집으로 진행: {self.brand_file}")
+            return self.fetch_hierarchy()
+        logger.info("=" * 60)
+        logger.info("헤이딜러 브랜드-모델 계층 증분 갱신 시작 (이전 CSV 대비)")
+        logger.info("=" * 60)
+
+        try:
+            all_data, delta, state = refresh_brand_hierarchy(
+                self.brand_file, self.session, logger, max_workers=self.max_workers, cache=self.cache
+            )
+            if all_data:
+                n_rows = self._save_rows(all_data)
+                save_snapshot_state(self.brand_file, state)
+                delta_file = save_delta_csv(self.brand_file, delta)
+
+                logger.info("=" * 60)
+                logger.info(f"✅ 갱신 완료! 파일: {self.brand_file}")
+                logger.info(f"총 모델 수: {n_rows:,}개, 변경분: {len(delta):,}건 → {delta_file}")
+                logger.info("=" * 60)
+            else:
+                logger.warning("⚠️ 수집된 데이터가 없습니다. (이전 파일 유지)")
+
+        except Exception as e:
+            logger.error(f"❌ 크롤링 중 치명적 오류: {e}")
+
 if __name__ == "__main__":
     crawler = HeyDealerBrandCrawler()
-    crawler.fetch_hierarchy()
\ No newline at end of file
+    if REFRESH_MODE:
+        crawler.refresh()
+    else:
+        crawler.fetch_hierarchy()
\ No newline at end of file
@@ -1,13 +1,33 @@
 #!/usr/bin/env python3
 import csv
-import re
-import time
-import requests
+import queue
+import threading
 import sys
 from datetime import datetime
 from pathlib import Path
 from playwright.sync_api import sync_playwright
 
+# 프로젝트 루트의 공용 모듈(common/) 사용
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.csv_writer import BufferedCsvWriter
+from common.image_downloader import ImageDownloader
+from common.image_store import ImageStore
+from common.job_queue import JobQueue, run_worker
+from common.listing_store import HEYDEALER_FP_FIELDS, ListingStore, listing_fingerprint
+from common.parquet_sink import with_parquet
+from common.rate_limiter import get_limiter, wait_before_retry
+from common.resource_blocker import BlockingProfile
+from common.scroll_driver import drive_lazy_load
+from heydealer_brand_matcher import load_matcher
+from heydealer_car_meta import create_session
+from heydealer_detail_spec import apply_spec, install_spec_extractor, read_spec
+from heydealer_market_api import (
+    XhrListCollector, car_hash_id, card_from_api, detail_from_api, fetch_car_detail, image_urls, iter_market_cars,
+)
+from heydealer_list_crawler import (
+    ListSink, crawl_list, crawl_list_shard, new_list_context, open_list_page, read_car_type_labels,
+)
+
 # --- 설정 및 경로 ---
 # ----- 목록 수집 모드 (테스트 vs 전체 무한스크롤) -----
 # [테스트] 몇 개만 수집: TARGET_COUNT = 숫자 (해당 개수 모이면 수집 종료)
@@ -16,7 +36,55 @@ from playwright.sync_api import sync_playwright
 TARGET_COUNT = 5
 # TARGET_COUNT = None
 
+# ----- 목록 데이터 출처 -----
+# "dom": 카드 DOM(.css-*)에서 필드 추출 (기존 방식)
+# "xhr": SPA가 호출하는 목록 API 응답(JSON)을 page.on("response")로 받아 바로 변환 (응답을 못 받으면 DOM으로 대체)
+LIST_SOURCE = "dom"
+
+# ----- 차종별 목록 병렬 수집 -----
+# 1: 한 탭에서 차종을 순서대로 전환 (기존 방식)
+# N: 차종마다 독립 BrowserContext를 열어 최대 N개 동시 수집 (워커마다 브라우저 1개)
+LIST_WORKERS = 1
+
+# ----- 브라우저 실행 옵션 -----
+# HEADLESS: 운영(서버)에서는 True, 화면 확인이 필요할 때만 False
+HEADLESS = False
+# BLOCK_RESOURCES: 목록·상세 페이지에서 이미지·미디어·폰트·외부 분석 스크립트 요청 차단
+#   (img src/data-src 속성은 남으므로 이미지 URL 수집·download_image 저장은 그대로)
+BLOCK_RESOURCES = True
+
+# ----- 목록→상세 스트리밍 -----
+# 목록에서 찾은 매물을 이 크기의 큐로 바로 상세 워커에 넘김 (큐가 차면 목록 수집이 잠시 대기 → 메모리 일정)
+PIPELINE_QUEUE_SIZE = 50
+# 상세 워커 수 (워커마다 브라우저·페이지 1개, 상세 CSV는 writer 스레드 하나가 순서대로 저장)
+DETAIL_WORKERS = 3
+
+# ----- 변경분만 상세 수집 -----
+# True: 목록 카드 값(가격·주행거리 등 HEYDEALER_FP_FIELDS)이 지난 실행과 같은 매물은 상세 페이지를 열지 않고
+#       cache/listing_store.sqlite3에 저장된 상세 행을 다시 씀
+#       (상세 행과 같이 저장해 둔 이미지 URL로 오늘 날짜 폴더에 이미지를 다시 둠 — 이미 받은 URL은 저장소 원본 하드링크라 재요청 없음)
+SKIP_UNCHANGED = True
+
+# ----- Parquet 출력 (선택, pyarrow 필요) -----
+# True: list/detail CSV와 같은 행을 result/heydealer/parquet/<이름>/date=YYYYMMDD/part.parquet 로도 저장
+#       (정수·날짜 타입, 브랜드·차종 등은 범주형 인코딩 → 여러 날짜 스냅샷을 빠르게 읽기용). pyarrow가 없으면 CSV만 저장
+PARQUET_OUTPUT = True
+
+# ----- 수집 엔진 -----
+# "browser": Playwright로 목록 무한스크롤 → 상세 페이지 방문 (기존 방식)
+# "api": 브라우저 없이 목록·상세 API를 직접 호출해 한 건씩 스트리밍 저장 (차종 필터 없이 전체 시장)
+ENGINE = "browser"
+
+# ----- 분산 작업 큐 (ENGINE="browser"일 때, PostgreSQL crawl_jobs 테이블) -----
+# None: 한 프로세스 안에서 목록→상세 (메모리 큐, 기존 방식)
+# "all": 차종별 목록 샤드를 작업 큐에 등록하고, 목록 샤드·상세 작업을 다른 서버 워커와 나눠서 처리
+# "worker": 등록은 하지 않고 큐에 쌓인 목록 샤드·상세 작업만 처리 (서버를 늘릴 때 추가 서버에서 실행)
+#   (각 서버의 list/detail CSV는 그 서버가 처리한 행만 담김 → common/pg_loader.py로 DB에 모아서 사용)
+JOB_QUEUE = None
+
 BASE_URL = "https://www.heydealer.com"
+# 상세 페이지 레이지 로딩 완료 판단용 섹션 (이미지 섹션 .css-ltrevz, 스펙 항목 .css-113wzqa)
+DETAIL_SECTIONS = (".css-12qft46 .css-ltrevz", ".css-113wzqa")
 BASE_DIR = Path(__file__).resolve().parent
 
 # 폴더 경로 설정 (프로젝트 루트 기준)
@@ -58,118 +126,26 @@ _today_img_dir = IMG_BASE / f"{datetime.now().strftime('%Y')}년" / datetime.now
 print(f"[{datetime.now()}] 🏁 헤이딜러 수집 프로그램 시작")
 print(f"📁 이미지 저장 경로: {_today_img_dir}")
 
-def load_brand_mapping():
-    """model_name(정확) -> {brand_id, brand_name}, brand_name(브랜드명) -> {brand_id, brand_name} 둘 다 반환."""
-    brand_map = {}
-    brand_by_name = {}
-    brand_file = RESULT_DIR / "heydealer_brand_list.csv"
-    if brand_file.exists():
-        with open(brand_file, "r", encoding="utf-8-sig") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                info = {"brand_id": row.get("brand_id", ""), "brand_name": row.get("brand_name", "").strip()}
-                model_name = (row.get("model_name") or "").strip()
-                if model_name:
-                    brand_map[model_name] = info
-                bn = info["brand_name"]
-                if bn and bn not in brand_by_name:
-                    brand_by_name[bn] = info
-    else:
-        print(f"⚠️ 매핑 파일이 없습니다: {brand_file}")
-    return brand_map, brand_by_name
-
-def get_now_times():
-    now = datetime.now()
-    return now.strftime("%Y%m%d"), now.strftime("%Y%m%d%H%M")
-
-def save_to_csv_append(file_path, fieldnames, data_dict):
-    file_exists = Path(file_path).exists()
-    with open(file_path, "a", newline="", encoding="utf-8-sig") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(data_dict)
+# 이미지는 백그라운드 다운로더가 받음 (연결 풀 재사용·큰 청크 저장). 추출 코드는 URL만 넘기고 바로 진행
+# 원본은 imgs/_objects에 해시로 한 번만 저장, 날짜 폴더에는 하드링크 (이전에 받은 URL은 재요청 없음)
+_img_downloader = ImageDownloader(headers={"Referer": BASE_URL}, store=ImageStore())
 
 def download_image(img_url, model_cd, idx):
-    """이미지 다운로드 함수. 저장 경로: imgs/heydealer/연도/YYYYMMDD/model_cd_idx.ext"""
-    try:
-        if not img_url or "svg" in img_url.lower():
-            return False
-        
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
-            "Referer": BASE_URL
-        }
-        
-        response = requests.get(img_url, stream=True, timeout=15, headers=headers)
-        
-        if response.status_code == 200:
-            ext = img_url.split(".")[-1].split("?")[0].lower()
-            if len(ext) > 4 or len(ext) < 2:
-                ext = "jpg"
-            
-            now = datetime.now()
-            save_dir = IMG_BASE / f"{now.strftime('%Y')}년" / now.strftime("%Y%m%d")
-            save_dir.mkdir(parents=True, exist_ok=True)
-            filename = f"{model_cd}_{idx}.{ext}"
-            save_path = save_dir / filename
-            
-            with open(save_path, "wb") as f:
-                for chunk in response.iter_content(1024):
-                    f.write(chunk)
-            return True
-        else:
-            return False
-            
-    except Exception as e:
+    """이미지 다운로드 예약. 저장 경로: imgs/heydealer/연도/YYYYMMDD/model_cd_idx.ext (저장 결과는 _img_downloader.summary())"""
+    if not img_url or "svg" in img_url.lower():
         return False
-
-def _extract_card_heydealer(elem, idx, brand_map, car_type="", brand_by_name=None) -> dict:
-    data = {"model_sn": idx, "brand_id": "", "brand_name": "", "car_type": car_type}
-    try:
-        href = elem.get_attribute("href") or ""
-        full_url = (BASE_URL + href).split("?")[0] if not href.startswith("http") else href.split("?")[0]
-        data["model_cd"] = full_url.split("/")[-1]
-        data["detail_url"] = full_url
-        m_box = elem.query_selector(".css-9j6363")
-        if m_box:
-            names = m_box.query_selector_all(".css-jk6asd")
-            raw_model_name = names[0].inner_text().strip() if len(names) > 0 else ""
-            data["model_name"] = raw_model_name
-            data["model_second_name"] = names[1].inner_text().strip() if len(names) > 1 else ""
-            matched = brand_map.get(raw_model_name)
-            if not matched and " " in raw_model_name:
-                sub_name = raw_model_name.split(" ", 1)[1].strip()
-                matched = brand_map.get(sub_name)
-            if not matched and brand_by_name:
-                for word in raw_model_name.replace("·", " ").split():
-                    w = word.strip()
-                    if w and brand_by_name.get(w):
-                        matched = brand_by_name[w]
-                        break
-            if matched:
-                data["brand_id"], data["brand_name"] = matched["brand_id"], matched["brand_name"]
-            grade = m_box.query_selector(".css-13wylk3")
-            data["grade_name"] = grade.inner_text().strip() if grade else ""
-        yk_el = elem.query_selector(".css-6bza35")
-        if yk_el:
-            txt = yk_el.inner_text().strip()
-            if "ㆍ" in txt:
-                p = txt.split("ㆍ")
-                data["year"], data["km"] = p[0].strip(), p[1].strip()
-            else: data["year"], data["km"] = txt, ""
-        price_area = elem.query_selector(".css-105xtr1 .css-1066lcq .css-dbu2tk")
-        if price_area:
-            sale = price_area.query_selector(".css-8sjynn")
-            data["sale_price"] = sale.inner_text().strip() if sale else price_area.inner_text().strip()
-        d_pnttm, c_dt = get_now_times()
-        data["date_crtr_pnttm"], data["create_dt"] = d_pnttm, c_dt
-    except: pass
-    return data
+    ext = img_url.split(".")[-1].split("?")[0].lower()
+    if len(ext) > 4 or len(ext) < 2:
+        ext = "jpg"
+    now = datetime.now()
+    save_dir = IMG_BASE / f"{now.strftime('%Y')}년" / now.strftime("%Y%m%d")
+    _img_downloader.submit(img_url, save_dir / f"{model_cd}_{idx}.{ext}")
+    return True
 
 def _extract_detail_smart(page, list_item) -> dict:
     """
     상세 페이지 데이터 추출 + 구조화된 이미지 수집
+    예약한 이미지 URL은 순서대로 "_image_urls" 키에 담김 (CSV 컬럼 아님, 상세 재사용 시 다시 예약)
     
     구조:
     .css-1uus6sd > .css-12qft46
@@ -205,13 +181,8 @@ def _extract_detail_smart(page, list_item) -> dict:
                 page.wait_for_selector(".css-113wzqa", timeout=10000)
             except Exception:
                 pass
-        page.wait_for_timeout(2000)
-        # 레이지 로딩/SPA 대비: 먼저 스크롤해서 섹션·이미지 로드
-        for i in range(1, 14):
-            page.evaluate(f"window.scrollTo(0, {i * 500})")
-            time.sleep(0.15)
-        page.evaluate("window.scrollTo(0, 0)")
-        page.wait_for_timeout(800)
+        # 레이지 로딩/SPA 대비: 뷰포트 단위로 끝까지 스크롤하며 이미지 로드 완료까지만 대기 후 맨 위로
+        drive_lazy_load(page, sections=DETAIL_SECTIONS)
         
         # print(f"      📸 이미지 수집 시작: {res['model_cd']}")
         
@@ -220,7 +191,8 @@ def _extract_detail_smart(page, list_item) -> dict:
         #   ├─ 두번째 .css-ltrevz > .css-5pr39e > .css-1i3qy3r > .css-1dpi6xl > button.css-q47uzu > img.css-q38rgl
         #   └─ 네번째 .css-ltrevz > .css-5pr39e > .css-1i3qy3r > .css-hf19cn > .css-1a3591h > img.css-158t7i4
         #       └─ .css-w9nhgi > img.css-158t7i4
-        downloaded_urls = set()
+        downloaded_urls = []
+        res["_image_urls"] = downloaded_urls
         img_idx = 1
 
         detail_container = page.query_selector(".css-1uus6sd .css-12qft46")
@@ -243,7 +215,7 @@ def _extract_detail_smart(page, list_item) -> dict:
                     src = img.get_attribute("src") or img.get_attribute("data-src")
                     if src and src not in downloaded_urls and "svg" not in src.lower():
                         if download_image(src, res["model_cd"], img_idx):
-                            downloaded_urls.add(src)
+                            downloaded_urls.append(src)
                             img_idx += 1
 
             # (2) 네번째 .css-ltrevz > ... > .css-hf19cn > .css-1a3591h > img.css-158t7i4
@@ -261,7 +233,7 @@ def _extract_detail_smart(page, list_item) -> dict:
                         src = img.get_attribute("src") or img.get_attribute("data-src")
                         if src and src not in downloaded_urls and "svg" not in src.lower():
                             if download_image(src, res["model_cd"], img_idx):
-                                downloaded_urls.add(src)
+                                downloaded_urls.append(src)
                                 img_idx += 1
                 # print(f"      📷 총 이미지 누적: {img_idx - 1}개")
 
@@ -274,16 +246,13 @@ def _extract_detail_smart(page, list_item) -> dict:
                 if not src or "svg" in src.lower() or src in downloaded_urls:
                     continue
                 if download_image(src, res["model_cd"], img_idx):
-                    downloaded_urls.add(src)
+                    downloaded_urls.append(src)
                     img_idx += 1
             if img_idx > 1:
                 print(f"      📷 폴백으로 {img_idx - 1}개 이미지 수집")
         # 섹션 적거나 0개일 때 한 번 더 스크롤 후 재시도 (vlgoq6l0 등 지연 로딩 페이지)
         if img_idx == 1:
-            page.wait_for_timeout(2000)
-            for i in range(1, 12):
-                page.evaluate(f"window.scrollTo(0, {i * 600})")
-                time.sleep(0.2)
+            drive_lazy_load(page, step_timeout_ms=2500, restore_top=False)
             retry_imgs = page.query_selector_all("img[src], img[data-src]")
             for img in retry_imgs:
                 src = img.get_attribute("src") or img.get_attribute("data-src")
@@ -291,17 +260,12 @@ def _extract_detail_smart(page, list_item) -> dict:
                     continue
                 if "heydealer" in src or "cdn." in src or len(src) > 20:
                     if download_image(src, res["model_cd"], img_idx):
-                        downloaded_urls.add(src)
+                        downloaded_urls.append(src)
                         img_idx += 1
             if img_idx > 1:
                 print(f"      📷 재시도로 {img_idx - 1}개 이미지 수집")
         # print(f"      📷 상세 이미지 다운로드 성공: {res['model_cd']} {img_idx - 1}장")
         
-        # === 페이지 스크롤 (동적 콘텐츠 로딩) ===
-        for i in range(1, 15):
-            page.evaluate(f"window.scrollTo(0, {i * 600})")
-            time.sleep(0.15)
-        
         # === 스펙 영역 로드 대기 (부분 수집 방지) ===
         for _ in range(2):
             try:
@@ -311,71 +275,15 @@ def _extract_detail_smart(page, list_item) -> dict:
                 page.wait_for_timeout(2000)
         page.wait_for_timeout(500)
 
-        # === 데이터 수집 로직 ===
-        option_elements = page.query_selector_all(".css-5pr39e .css-13wylk3, .css-5pr39e .css-1396o7r")
-        if option_elements:
-            res["options"] = ", ".join([str(opt.inner_text() or "").strip() for opt in option_elements if str(opt.inner_text() or "").strip()])
-
-        containers = page.query_selector_all(".css-1cfq7ri")
-        for container in containers:
-            if "출고 정보" in container.inner_text():
-                info_val = container.query_selector(".css-1n3oo4w")
-                if info_val:
-                    res["delivery_information"] = info_val.inner_text().replace("\n", " | ").strip()
-                    break
-
-        rec_el = page.query_selector(".css-yfldxx")
-        if rec_el:
-            res["recommendation_comment"] = rec_el.inner_text().replace("\n", " | ").strip()
-
-        def _fill_spec_from_items(items_selector):
-            filled = 0
-            for item in page.query_selector_all(items_selector):
-                lbl_el = item.query_selector(".css-1b7o1k1")
-                if not lbl_el:
-                    continue
-                lbl = lbl_el.inner_text().replace(" ", "").strip()
-                val_el = item.query_selector(".css-1b7o1k1 + div")
-                if not val_el:
-                    try:
-                        raw = item.evaluate("""node => {
-                            const l = node.querySelector('.css-1b7o1k1');
-                            if (!l) return '';
-                            const n = l.nextElementSibling;
-                            return n ? (n.innerText || n.textContent || '').trim() : '';
-                        }""")
-                        val = str(raw).strip() if raw is not None else ""
-                    except Exception:
-                        val = ""
-                else:
-                    val = str(val_el.inner_text() or "").strip()
-                if not val:
-                    continue
-                if "연식" in lbl and not res["year"]: res["year"] = val; filled += 1
-                elif "주행거리" in lbl and not res["km"]: res["km"] = val; filled += 1
-                elif "환불" in lbl and not res["refund"]: res["refund"] = val; filled += 1
-                elif "헤이딜러보증" in lbl and not res["guarantee"]: res["guarantee"] = val; filled += 1
-                elif "사고" in lbl and not res["accident"]: res["accident"] = val; filled += 1
-                elif "실내세차" in lbl and not res["inner_car_wash"]: res["inner_car_wash"] = val; filled += 1
-                elif "자차보험처리" in lbl and not res["insurance"]: res["insurance"] = val; filled += 1
-                elif "외부" in lbl and not res["exterior_description"]: res["exterior_description"] = val; filled += 1
-                elif "실내" in lbl and "세차" not in lbl and not res["interior_description"]: res["interior_description"] = val; filled += 1
-                elif "타이어" in lbl and not res["tire"]: res["tire"] = val; filled += 1
-                elif "틴팅" in lbl and not res["tinting"]: res["tinting"] = val; filled += 1
-                elif "차키" in lbl and not res["car_key"]: res["car_key"] = val; filled += 1
-            return filled
-
-        _fill_spec_from_items(".css-113wzqa")
+        # === 데이터 수집 로직 === (스펙·옵션·출고 정보·추천 코멘트를 evaluate 1회로)
+        apply_spec(res, read_spec(page))
         # 스펙이 비었으면 로딩 지연으로 재대기 후 재추출 (최대 2회)
         for _ in range(2):
             if res.get("year") or res.get("km"):
                 break
             page.wait_for_timeout(3000 if _ == 0 else 5000)
-            for i in range(1, 10):
-                page.evaluate(f"window.scrollTo(0, {i * 400})")
-                time.sleep(0.2)
-            page.wait_for_timeout(1500)
-            _fill_spec_from_items(".css-113wzqa")
+            drive_lazy_load(page, sections=(".css-113wzqa",), restore_top=False)
+            apply_spec(res, read_spec(page))
         
         # 수집 결과
         filled_fields = sum(1 for k, v in res.items() if v and k not in ["model_sn", "model_cd", "detail_url", "date_crtr_pnttm", "create_dt"])
@@ -387,269 +295,320 @@ def _extract_detail_smart(page, list_item) -> dict:
     
     return res
 
+def _run_api_engine(matcher, list_csv, detail_csv):
+    """[ENGINE="api"] 목록 API 레코드를 받는 대로 상세 API까지 호출해 list/detail CSV에 한 행씩 저장 (목록 전체를 메모리에 두지 않음)"""
+    detail_fields = detail_csv.fieldnames
+    session = create_session()
+    if TARGET_COUNT is not None:
+        print(f"\n🚀 [API] 목록·상세 수집 시작 (테스트: 목표 {TARGET_COUNT}개)")
+    else:
+        print(f"\n🚀 [API] 목록·상세 수집 시작 (전체)")
+    seen = set()
+    n_list, success_count, img_total = 0, 0, 0
+    for rec in iter_market_cars(session):
+        if TARGET_COUNT is not None and n_list >= TARGET_COUNT:
+            break
+        hash_id = car_hash_id(rec)
+        if not hash_id or hash_id in seen:
+            continue
+        seen.add(hash_id)
+        item = card_from_api(rec, n_list + 1, matcher)
+        list_csv.writerow(item)
+        n_list += 1
+        try:
+            detail_rec = fetch_car_detail(session, hash_id) or rec
+            detail = detail_from_api(detail_rec, item)
+            img_idx = 1
+            for url in image_urls(detail_rec):
+                if download_image(url, hash_id, img_idx):
+                    img_idx += 1
+            img_total += img_idx - 1
+            success_count += 1
+        except Exception as e:
+            print(f"      ⚠️ 상세 API 오류 ({hash_id}): {str(e)[:50]}")
+            detail = {}
+        # 상세 비어 있으면 목록 값으로 채움 (값은 항상 str로)
+        for k in detail_fields:
+            if not str(detail.get(k) or "").strip():
+                detail[k] = str(item.get(k) or "").strip()
+        detail_csv.writerow(detail)
+        if n_list % 100 == 0:
+            # 체크포인트: 중간에 끊겨도 여기까지의 행은 디스크에 남음
+            list_csv.checkpoint()
+            detail_csv.checkpoint()
+            print(f" 🔄 [API] {n_list}대 수집 (상세 성공 {success_count}, 이미지 {img_total}장)")
+
+    if n_list == 0:
+        print("   ⚠️ 수집된 목록이 없습니다.")
+    print(f"\n[{datetime.now()}] ✅ 모든 작업 완료! (API 엔진)")
+    print(f"   - 목록: {n_list}개 → {LIST_FILE}")
+    pct = (success_count / n_list * 100) if n_list else 0.0
+    print(f"   - 상세 성공: {success_count}/{n_list}개 ({pct:.1f}%) → {DETAIL_FILE}")
+    print(f"   - 이미지: {img_total}장")
+    print(f"   - 로그: {LOG_FILE}")
+
+# 페이지·컨텍스트·렌더러가 죽었을 때 Playwright 오류 메시지 (TargetClosedError·크래시)
+_DEAD_PAGE_MARKERS = ("has been closed", "target closed", "crashed")
+
+
+def _page_dead(page, err):
+    """재시도해도 소용없는 오류인지 (페이지 닫힘·렌더러 크래시) — 호출부가 컨텍스트를 새로 만들어야 함"""
+    try:
+        if page.is_closed():
+            return True
+    except Exception:
+        return True
+    msg = str(err).lower()
+    return any(m in msg for m in _DEAD_PAGE_MARKERS)
+
+
+def _crawl_detail(page, item, detail_fields):
+    """
+    상세 1건 수집 (최대 3회). 성공 시 상세 행, 최종 실패 시 목록 값만 채운 행 → (row, success, 시도 횟수).
+    페이지·컨텍스트가 죽은 경우(_page_dead)는 재시도하지 않고 예외를 그대로 올림 (호출부가 컨텍스트 교체)
+    """
+    for retry in range(3):
+        try:
+            retry_text = f'재시도({retry})' if retry > 0 else '수집'
+            print(f"\n 🔍 ({item['model_sn']}) {retry_text}: {item['model_cd']}")
+
+            get_limiter().acquire(item["detail_url"])
+            page.goto(item["detail_url"], wait_until="domcontentloaded", timeout=40000)
+            page.wait_for_load_state("load", timeout=15000)
+            page.wait_for_timeout(1500)
+            detail = _extract_detail_smart(page, item)
+            # 스펙이 거의 비었으면 한 번 더 로드 후 재추출 (빈값 행 감소)
+            spec_keys = ("year", "km", "refund", "guarantee", "accident")
+            filled_spec = sum(1 for k in spec_keys if str(detail.get(k) or "").strip())
+            if filled_spec < 2 and retry < 2:
+                page.wait_for_timeout(3000)
+                get_limiter().acquire(item["detail_url"])
+                page.goto(item["detail_url"], wait_until="load", timeout=40000)
+                page.wait_for_timeout(2500)
+                detail = _extract_detail_smart(page, item)
+            # 상세 비어 있으면 목록 값으로 채움 (값은 항상 str로)
+            for k in detail_fields:
+                if k in item and not str(detail.get(k) or "").strip():
+                    detail[k] = str(item.get(k) or "").strip()
+            return detail, True, retry + 1
+        except Exception as e:
+            print(f"      ⚠️ 오류: {str(e)[:50]}")
+            if _page_dead(page, e):
+                raise
+            if retry < 2:
+                wait_before_retry(retry + 1, item["detail_url"])
+
+    print(f"      ❌ 최종 실패 (목록 데이터만 저장)")
+    fail_row = {k: str(item.get(k) or "") for k in detail_fields if k in item}
+    for k in detail_fields:
+        if k not in fail_row:
+            fail_row[k] = ""
+    return fail_row, False, 3
+
+
+def _detail_worker(worker_id, items, results, detail_fields, wstats, profile=None, store=None):
+    """
+    [2단계] 상세 워커 스레드: 큐에서 목록 행을 꺼내는 대로 상세 수집 → results 큐로 전달. None을 받으면 종료.
+    sync Playwright 객체는 만든 스레드에서만 쓸 수 있어 워커마다 자체 브라우저를 띄웁니다.
+    wstats: 이 워커의 처리/성공/실패/재시도 건수. store가 있으면 성공한 상세 행을 목록 지문과 함께 저장
+    """
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=HEADLESS)
+        # 스펙 추출 스크립트는 컨텍스트당 한 번 주입
+        context = install_spec_extractor(new_list_context(browser, profile))
+        page = context.new_page()
+        try:
+            while True:
+                item = items.get()
+                if item is None:
+                    break
+                try:
+                    row, ok, tries = _crawl_detail(page, item, detail_fields)
+                except Exception as e:
+                    # 페이지·렌더러가 죽은 경우: 죽은 컨텍스트는 닫고 교체 (실패마다 컨텍스트·렌더러가 쌓이지 않게)
+                    print(f"      ❌ 워커{worker_id} 페이지 오류, 컨텍스트 교체 ({item.get('model_cd')}): {str(e)[:50]}")
+                    try:
+                        context.close()
+                    except Exception:
+                        pass
+                    context = install_spec_extractor(new_list_context(browser, profile))
+                    page = context.new_page()
+                    # 새 페이지에서 이 매물 한 번 더, 그래도 안 되면 목록 값만 저장
+                    try:
+                        row, ok, tries = _crawl_detail(page, item, detail_fields)
+                    except Exception:
+                        row, ok, tries = {k: str(item.get(k) or "") for k in detail_fields}, False, 1
+                results.put(row)
+                if ok and store is not None:
+                    store.put("heydealer", item.get("model_cd"), listing_fingerprint(item, HEYDEALER_FP_FIELDS), row)
+                wstats["done"] += 1
+                wstats["success" if ok else "failed"] += 1
+                wstats["retries"] += tries - 1
+        finally:
+            browser.close()
+
+
+def _reuse_detail(store, item):
+    """
+    목록 값이 지난 실행과 같은 매물이면 저장된 상세 행 (순번·수집 시각만 이번 값), 아니면 None.
+    저장해 둔 이미지 URL은 오늘 날짜 폴더로 다시 예약 (이미 받은 URL은 재요청 없이 하드링크)
+    """
+    cached = store.get("heydealer", item.get("model_cd"), listing_fingerprint(item, HEYDEALER_FP_FIELDS))
+    # 이미지 URL 없이 저장된 예전 행은 상세를 다시 수집 (날짜 폴더 이미지가 빠지지 않게)
+    if cached is None or "_image_urls" not in cached:
+        return None
+    for idx, url in enumerate(cached.pop("_image_urls"), start=1):
+        download_image(url, item.get("model_cd"), idx)
+    for k in ("model_sn", "car_type", "detail_url", "date_crtr_pnttm", "create_dt"):
+        if k in item:
+            cached[k] = str(item[k])
+    return cached
+
+
+def _detail_writer(results, detail_csv):
+    """상세 CSV 단일 writer: 워커 결과를 받은 순서대로 한 스레드에서만 저장 (None이면 종료)"""
+    while True:
+        row = results.get()
+        if row is None:
+            break
+        detail_csv.writerow(row)
+
+
 def main():
-    brand_map, brand_by_name = load_brand_mapping()
+    # brand CSV 기반 사전 컴파일 매칭 인덱스 (CSV가 바뀌었을 때만 재생성)
+    matcher = load_matcher(RESULT_DIR / "heydealer_brand_list.csv")
     list_fields = ["model_sn", "brand_id", "brand_name", "model_cd", "model_name", "model_second_name", "grade_name", "car_type", "year", "km", "sale_price", "detail_url", "date_crtr_pnttm", "create_dt"]
     detail_fields = ["model_sn", "brand_id", "brand_name", "model_cd", "model_name", "model_second_name", "grade_name", "year", "km", "refund", "guarantee", "accident", "inner_car_wash", "insurance", "exterior_description", "interior_description", "options", "delivery_information", "recommendation_comment", "tire", "tinting", "car_key", "detail_url", "date_crtr_pnttm", "create_dt"]
 
     if LIST_FILE.exists(): LIST_FILE.unlink()
     if DETAIL_FILE.exists(): DETAIL_FILE.unlink()
 
+    # 목록·상세 CSV는 실행 내내 열어 두고 묶음으로 기록 (헤더는 새 파일에 한 번, 종료 시 fsync)
+    list_csv = with_parquet(BufferedCsvWriter(LIST_FILE, list_fields), RESULT_DIR, "heydealer_list", PARQUET_OUTPUT)
+    detail_csv = with_parquet(BufferedCsvWriter(DETAIL_FILE, detail_fields), RESULT_DIR, "heydealer_detail", PARQUET_OUTPUT)
+    try:
+        if ENGINE == "api":
+            _run_api_engine(matcher, list_csv, detail_csv)
+        elif JOB_QUEUE:
+            _run_queue_engine(matcher, list_csv, detail_csv)
+        else:
+            _run_browser_engine(matcher, list_csv, detail_csv)
+    finally:
+        list_csv.close()
+        detail_csv.close()
+
+def _run_browser_engine(matcher, list_csv, detail_csv):
+    """[ENGINE="browser"] 목록 무한스크롤 + 상세 워커 스트리밍 수집"""
+    detail_fields = detail_csv.fieldnames
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
-        context = browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
-            viewport={'width': 1920, 'height': 1080}
-        )
+        browser = p.chromium.launch(headless=HEADLESS)
+        profile = BlockingProfile() if BLOCK_RESOURCES else None
+        context = new_list_context(browser, profile)
         page = context.new_page()
-        page.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        # XHR 모드: 목록 페이지 이동 전에 응답 리스너 연결 (첫 페이지 응답 포함)
+        xhr = XhrListCollector(page) if LIST_SOURCE == "xhr" else None
         
         # 테스트(TARGET_COUNT 숫자) vs 전체(TARGET_COUNT=None) 에 따라 메시지 분기
         if TARGET_COUNT is not None:
             print(f"\n🚀 [1단계] 목록 수집 시작 (테스트: 목표 {TARGET_COUNT}개)")
         else:
             print(f"\n🚀 [1단계] 목록 수집 시작 (전체: 무한스크롤 끝까지)")
-        list_url = f"{BASE_URL}/market/cars"
-        for nav_try in range(3):
-            try:
-                page.goto(list_url, wait_until="commit", timeout=60000)
-                page.wait_for_load_state("domcontentloaded", timeout=15000)
-                break
-            except Exception as e:
-                if nav_try < 2:
-                    print(f"   ⚠️ 목록 페이지 재시도 ({nav_try + 2}/3)...")
-                    time.sleep(3)
-                else:
-                    raise RuntimeError(f"목록 페이지 접속 실패: {list_url}") from e
-        page.wait_for_timeout(3000)
-
-        # ----- 차체: 클래스명 없이 텍스트·구조만 사용 (클래스 변경에 강함) -----
-        # 흐름: [1] 차체 탭 클릭 → 오버레이에서 차종 버튼(경∙소형, 세단 등) 텍스트로 찾기 → 선택 → N대 보기 → 목록 수집
-        # 정규화 후 비교용 (중점·공백 표기 차이 무시: SUV · RV, SUV∙RV, 경 · 소형 등)
-        CANONICAL_CAR_BODY = {"경∙소형", "세단", "SUV∙RV", "쿠페", "리무진", "컨버터블", "해치백"}
-
-        def _normalize_car_label(txt):
-            """차종 텍스트 정규화: 공백·다양한 중점(·∙) 통일 후 비교"""
-            if not txt:
-                return ""
-            s = (txt or "").strip()
-            s = re.sub(r"\s*[·∙]\s*", "∙", s)  # ' · ' / '∙' -> '∙'
-            s = re.sub(r"\s+", " ", s).strip()
-            return s
-
-        def _open_car_body_panel():
-            """차체 탭: 텍스트 '차체'인 버튼 클릭 (클래스 무관)"""
-            tab = page.get_by_role("button", name="차체")
-            if tab.count() == 0:
-                tab = page.locator("#root button").filter(has_text=re.compile(r"^차체$"))
-            if tab.count() == 0:
-                # 폴백: 필터 영역 6번째 버튼 (차체가 6번째인 경우)
-                tab = page.locator("#root button[type='button']").nth(5)
-            if tab.count() > 0:
-                tab.first.scroll_into_view_if_needed()
-                tab.first.click(force=True)
-                page.wait_for_timeout(600)
-
-        def _get_car_body_overlay():
-            """차체 오버레이: '차체' 문구와 'N대 보기' 버튼이 함께 있는 컨테이너 (클래스 무관)"""
-            overlay = page.locator("div").filter(
-                has=page.locator("button").filter(has_text=re.compile(r"[\d,]+대\s*보기"))
-            ).filter(has=page.get_by_text("차체"))
-            return overlay.first
-
-        def _get_car_type_labels_from_overlay(overlay):
-            """오버레이 안에서 차종 버튼 텍스트만 수집 (순서 유지). 정규화 후 CANONICAL과 매칭, 클릭용으로는 페이지의 실제 텍스트 사용."""
-            labels = []
-            try:
-                for node in overlay.locator("button").all():
-                    raw = (node.inner_text() or "").strip()
-                    if not raw or re.match(r"[\d,]+대\s*보기", raw) or raw == "초기화":
-                        continue
-                    canonical = _normalize_car_label(raw)
-                    if canonical in CANONICAL_CAR_BODY:
-                        labels.append(raw)
-            except Exception:
-                pass
-            return labels
+        open_list_page(page)
 
-        _open_car_body_panel()
-        page.wait_for_timeout(700)
-        overlay = _get_car_body_overlay()
-        car_type_entries = []  # [(인덱스, 차종명), ...]
+        # ----- 차체: 클래스명 없이 텍스트·구조만 사용 (heydealer_list_crawler) -----
+        # 흐름: [1] 차체 탭 클릭 → 오버레이에서 차종 버튼(경∙소형, 세단 등) 텍스트로 찾기 → 선택 → N대 보기 → 목록 수집
         try:
-            if overlay.count() > 0:
-                car_type_labels = _get_car_type_labels_from_overlay(overlay)
-                car_type_entries = list(enumerate(car_type_labels))
-            if not car_type_entries:
-                page.keyboard.press("Escape")
-                page.wait_for_timeout(1000)
-                car_type_entries = [(0, "")]
-            else:
-                print(f" 📌 차종(차체) {len(car_type_entries)}개 (텍스트 기준): {[lbl for _, lbl in car_type_entries]}")
-                # 차종 목록만 따로 CSV 저장 (car_type_sn, car_type_name)
-                with open(CAR_TYPE_LIST_FILE, "w", newline="", encoding="utf-8-sig") as f:
-                    writer = csv.DictWriter(f, fieldnames=["car_type_sn", "car_type_name"])
-                    writer.writeheader()
-                    for sn, (_, car_type_name) in enumerate(car_type_entries, 1):
-                        writer.writerow({"car_type_sn": sn, "car_type_name": car_type_name})
-                print(f" 📄 차종 목록 저장: {CAR_TYPE_LIST_FILE}")
-                page.keyboard.press("Escape")
-                page.wait_for_timeout(1000)
+            car_types = read_car_type_labels(page)
         except Exception as e:
             print(f"   ⚠️ 차체 옵션 읽기 실패: {e}")
-            car_type_entries = [(0, "")]
-
-        raw_list, seen = [], set()
-
-        for entry_idx, (car_type_idx, current_car_type) in enumerate(car_type_entries):
-            collected_this_type = 0
-            prev_count = len(raw_list)
-            no_new_rounds = 0
-            if len(car_type_entries) > 1:
-                select_ok = False
-                for _attempt in range(2):
-                    try:
-                        if _attempt > 0:
-                            page.keyboard.press("Escape")
-                            page.wait_for_timeout(800)
-                        _open_car_body_panel()
-                        page.wait_for_timeout(700)
-                        overlay = _get_car_body_overlay()
-                        if overlay.count() == 0:
-                            raise RuntimeError("차체 오버레이를 찾을 수 없음")
-                        # 이전 차종 해제 후 현재 차종 선택 (텍스트로 버튼 찾기)
-                        if entry_idx > 0:
-                            prev_label = car_type_entries[entry_idx - 1][1]
-                            prev_btn = overlay.locator("button").filter(has_text=re.compile(re.escape(prev_label)))
-                            if prev_btn.count() > 0:
-                                prev_btn.first.scroll_into_view_if_needed()
-                                prev_btn.first.click(force=True)
-                                page.wait_for_timeout(400)
-                        btn = overlay.locator("button").filter(has_text=re.compile(re.escape(current_car_type)))
-                        if btn.count() == 0:
-                            print(f"   ⚠️ [{current_car_type}] 차종 버튼 없음, 건너뜀")
-                            break
-                        btn.first.scroll_into_view_if_needed()
-                        page.wait_for_timeout(200)
-                        btn.first.click(force=True)
-                        page.wait_for_timeout(600)
-                        view_btn = overlay.locator("button").filter(has_text=re.compile(r"[\d,]+대\s*보기"))
-                        if view_btn.count() > 0:
-                            view_btn.first.click()
-                            page.wait_for_timeout(2500)
-                        else:
-                            page.wait_for_timeout(1500)
-                        print(f" 🔘 차종 선택·적용: {current_car_type} → 목록 수집 시작")
-                        select_ok = True
-                        break
-                    except Exception as e:
-                        print(f"   ⚠️ 차종 선택/보기 실패 ({current_car_type}), 재시도 예정: {e}")
-                if not select_ok:
-                    continue
-
-            # 5) 적용된 차종 목록만 무한 스크롤로 수집 (테스트 시 이 차종에서 TARGET_COUNT개만, 전체 시 끝까지)
-            while True:
-                if TARGET_COUNT is not None and collected_this_type >= TARGET_COUNT:
-                    print(f" ✅ [{current_car_type}] 목표 {TARGET_COUNT}개 수집 완료")
-                    break
-
-                prev_collected_this_type = collected_this_type
-                last_height = page.evaluate("document.body.scrollHeight")
-                page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                page.wait_for_timeout(2500)
-
-                cards = page.query_selector_all('a[href^="/market/cars/"]')
-                for card in cards:
-                    if TARGET_COUNT is not None and collected_this_type >= TARGET_COUNT:
-                        break
-
-                    href = (card.get_attribute("href") or "").split("?")[0]
-                    if href and href not in seen:
-                        seen.add(href)
-                        item = _extract_card_heydealer(card, len(raw_list) + 1, brand_map, car_type=current_car_type, brand_by_name=brand_by_name)
-                        raw_list.append(item)
-                        save_to_csv_append(LIST_FILE, list_fields, item)
-                        collected_this_type += 1
-
-                if collected_this_type == prev_collected_this_type:
-                    no_new_rounds += 1
-                else:
-                    no_new_rounds = 0
-                prev_count = len(raw_list)
-
-                if TARGET_COUNT is not None:
-                    print(f" 🔄 목록 수집 [{current_car_type}]: {collected_this_type}/{TARGET_COUNT}대 (총 {len(raw_list)}대)")
-                else:
-                    print(f" 🔄 목록 수집 [{current_car_type}]: {collected_this_type}대 (총 {len(raw_list)}대)")
-
-                new_height = page.evaluate("document.body.scrollHeight")
-                if new_height == last_height:
-                    page.wait_for_timeout(2000)
-                    if page.evaluate("document.body.scrollHeight") == last_height:
-                        print(f"🏁 페이지 끝 도달 (총 {len(raw_list)}대)")
-                        break
-                else:
-                    no_new_rounds = 0
-                if no_new_rounds >= 2:
-                    print(f"🏁 새 매물 없음, 수집 종료 (총 {len(raw_list)}대)")
-                    break
-
-        print(f"\n📄 목록 CSV 생성 완료: {LIST_FILE} ({len(raw_list)}건)")
-        print(f"\n🚀 [2단계] 상세 수집 시작 (총 {len(raw_list)}대)")
-        success_count = 0
-
-        # 목록이 비어 있으면 상세 파일은 헤더만 생성 (파일 미생성·0나누기 방지)
-        if len(raw_list) == 0:
-            with open(DETAIL_FILE, "w", newline="", encoding="utf-8-sig") as f:
-                writer = csv.DictWriter(f, fieldnames=detail_fields, extrasaction='ignore')
+            car_types = []
+        if car_types:
+            print(f" 📌 차종(차체) {len(car_types)}개 (텍스트 기준): {car_types}")
+            # 차종 목록만 따로 CSV 저장 (car_type_sn, car_type_name)
+            with open(CAR_TYPE_LIST_FILE, "w", newline="", encoding="utf-8-sig") as f:
+                writer = csv.DictWriter(f, fieldnames=["car_type_sn", "car_type_name"])
                 writer.writeheader()
-            print("   ⚠️ 수집된 목록이 없어 상세 수집을 건너뜁니다.")
+                for sn, car_type_name in enumerate(car_types, 1):
+                    writer.writerow({"car_type_sn": sn, "car_type_name": car_type_name})
+            print(f" 📄 차종 목록 저장: {CAR_TYPE_LIST_FILE}")
         else:
-            for idx, item in enumerate(raw_list, 1):
-                success = False
-                for retry in range(3):
-                    try:
-                        retry_text = f'재시도({retry})' if retry > 0 else '수집'
-                        print(f"\n 🔍 ({idx}/{len(raw_list)}) {retry_text}: {item['model_cd']}")
-                        
-                        page.goto(item["detail_url"], wait_until="domcontentloaded", timeout=40000)
-                        page.wait_for_load_state("load", timeout=15000)
-                        page.wait_for_timeout(1500)
-                        detail = _extract_detail_smart(page, item)
-                        # 스펙이 거의 비었으면 한 번 더 로드 후 재추출 (빈값 행 감소)
-                        spec_keys = ("year", "km", "refund", "guarantee", "accident")
-                        filled_spec = sum(1 for k in spec_keys if str(detail.get(k) or "").strip())
-                        if filled_spec < 2 and retry < 2:
-                            page.wait_for_timeout(3000)
-                            page.goto(item["detail_url"], wait_until="load", timeout=40000)
-                            page.wait_for_timeout(2500)
-                            detail = _extract_detail_smart(page, item)
-                        # 상세 비어 있으면 목록 값으로 채움 (값은 항상 str로)
-                        for k in detail_fields:
-                            if k in item and not str(detail.get(k) or "").strip():
-                                detail[k] = str(item.get(k) or "").strip()
-                        save_to_csv_append(DETAIL_FILE, detail_fields, detail)
-                        success = True
-                        success_count += 1
-                        break
-                    except Exception as e:
-                        print(f"      ⚠️ 오류: {str(e)[:50]}")
-                        if retry < 2:
-                            time.sleep(2)
-                
-                if not success:
-                    print(f"      ❌ 최종 실패 (목록 데이터만 저장)")
-                    fail_row = {k: str(item.get(k) or "") for k in detail_fields if k in item}
-                    for k in detail_fields:
-                        if k not in fail_row:
-                            fail_row[k] = ""
-                    save_to_csv_append(DETAIL_FILE, detail_fields, fail_row)
+            car_types = [""]
+
+        # 5) 차종별 목록 무한 스크롤 수집 (테스트 시 차종마다 TARGET_COUNT개만, 전체 시 끝까지)
+        #    LIST_WORKERS > 1 이면 차종마다 독립 컨텍스트에서 병렬 수집, 중복(href)·순번은 sink가 공유 관리
+        #    찾은 매물은 목록 CSV 저장과 동시에 큐로 상세 워커에 전달 (목록 전체를 메모리에 두지 않음)
+        items = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        results = queue.Queue()
+        store = ListingStore() if SKIP_UNCHANGED else None
+        worker_stats = [{"done": 0, "success": 0, "failed": 0, "retries": 0} for _ in range(DETAIL_WORKERS)]
+        workers = [
+            threading.Thread(target=_detail_worker, args=(i + 1, items, results, detail_fields, worker_stats[i], profile, store),
+                             daemon=True)
+            for i in range(DETAIL_WORKERS)
+        ]
+        writer_thread = threading.Thread(target=_detail_writer, args=(results, detail_csv), daemon=True)
+        writer_thread.start()
+        for t in workers:
+            t.start()
+        print(f"\n🚀 [2단계] 상세 수집 워커 {DETAIL_WORKERS}개 시작 (목록 수집과 동시 진행, 큐 {PIPELINE_QUEUE_SIZE}건)")
+
+        def _put(item):
+            # 큐가 가득 차면 상세 워커가 따라올 때까지 대기 (워커가 모두 죽었으면 무한 대기 대신 중단)
+            while True:
+                try:
+                    items.put(item, timeout=5)
+                    return
+                except queue.Full:
+                    if not any(t.is_alive() for t in workers):
+                        raise RuntimeError("상세 수집 워커가 모두 종료되어 목록 수집을 중단합니다.")
+
+        def _on_item(item):
+            list_csv.writerow(item)
+            # 목록 값이 그대로인 매물: 상세 페이지 방문 없이 지난 상세 행 재사용
+            cached = _reuse_detail(store, item) if store is not None else None
+            if cached is not None:
+                results.put(cached)
+                return
+            _put(item)
+
+        sink = ListSink(on_item=_on_item, keep_items=False)
+        try:
+            crawl_list(page, car_types, sink, matcher, target_count=TARGET_COUNT, workers=LIST_WORKERS,
+                       list_source=LIST_SOURCE, xhr=xhr, headless=HEADLESS, profile=profile)
+        finally:
+            for _ in workers:
+                _put(None)
+            list_csv.checkpoint()
+
+        if xhr is not None:
+            print(f"   📡 목록 API 응답 {xhr.n_responses}건 수신 (XHR 모드)")
+            xhr.close()
+        n_list = len(sink)
+        n_done = sum(ws["done"] for ws in worker_stats)
+        print(f"\n📄 목록 CSV 생성 완료: {LIST_FILE} ({n_list}건), 남은 상세 {n_list - n_done}건 처리 대기")
+        for t in workers:
+            t.join()
+        results.put(None)
+        writer_thread.join()
+        n_reused = store.hits if store is not None else 0
+        success_count = sum(ws["success"] for ws in worker_stats) + n_reused
+        if store is not None:
+            print(f"   ♻️ 상세 재사용: {store.summary()}")
+            store.close()
+        for i, ws in enumerate(worker_stats, 1):
+            print(f"   🧵 상세 워커{i}: 처리 {ws['done']}건 (성공 {ws['success']}, 실패 {ws['failed']}, 재시도 {ws['retries']}회)")
+
+        # 목록이 비어 있으면 상세 파일은 헤더만 남음 (BufferedCsvWriter가 열 때 기록)
+        if n_list == 0:
+            print("   ⚠️ 수집된 목록이 없어 상세 수집을 건너뜁니다.")
 
         print(f"\n📄 상세 CSV 생성 완료: {DETAIL_FILE} ({success_count}건)")
         print(f"\n[{datetime.now()}] ✅ 모든 작업 완료!")
-        print(f"   - 목록: {len(raw_list)}개")
-        pct = (success_count / len(raw_list) * 100) if raw_list else 0.0
-        print(f"   - 상세 성공: {success_count}/{len(raw_list)}개 ({pct:.1f}%)")
+        print(f"   - 목록: {n_list}개")
+        pct = (success_count / n_list * 100) if n_list else 0.0
+        print(f"   - 상세 성공: {success_count}/{n_list}개 ({pct:.1f}%)")
+        if profile is not None:
+            print(f"   - 리소스 차단: {profile.summary()}")
         print(f"   - 결과: {RESULT_DIR}")
         _img_today = IMG_BASE / f"{datetime.now().strftime('%Y')}년" / datetime.now().strftime("%Y%m%d")
         print(f"   - 이미지: {_img_today}")
@@ -657,5 +616,151 @@ def main():
         
         browser.close()
 
+def _queue_list_worker(worker_id, sink, matcher, profile):
+    """[JOB_QUEUE] 목록 샤드(차종) 작업을 큐에서 하나씩 가져와 수집. 차종 선택·페이지 오류는 재시도 예약"""
+    jobq = JobQueue()
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=HEADLESS)
+
+        def handle(job):
+            car_type = job.payload.get("car_type", "")
+            n = crawl_list_shard(browser, car_type, sink, matcher, TARGET_COUNT, LIST_SOURCE, profile)
+            print(f" 🧵 목록 워커{worker_id} [{car_type}] 완료: {n}대")
+
+        try:
+            run_worker(jobq, "heydealer", "list_shard", handle,
+                       keep_running=lambda: jobq.count_active("heydealer", "list_shard") > 0)
+        finally:
+            browser.close()
+            jobq.close()
+
+
+def _queue_detail_worker(worker_id, results, detail_fields, wstats, profile=None, store=None):
+    """
+    [JOB_QUEUE] 상세 작업을 큐에서 가져와 _crawl_detail. 최종 실패는 시도 횟수가 남았으면 재시도 예약,
+    마지막 시도면 목록 값만 채운 행을 저장. 목록 샤드·상세 작업이 남아 있는 동안은 새 작업을 기다림
+    """
+    jobq = JobQueue()
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=HEADLESS)
+        context = install_spec_extractor(new_list_context(browser, profile))
+        page = context.new_page()
+
+        def _replace_context():
+            nonlocal context, page
+            try:
+                context.close()
+            except Exception:
+                pass
+            context = install_spec_extractor(new_list_context(browser, profile))
+            page = context.new_page()
+
+        def handle(job):
+            item = job.payload
+            try:
+                row, ok, tries = _crawl_detail(page, item, detail_fields)
+            except Exception as e:
+                # 페이지·렌더러가 죽음(_crawl_detail이 올림): 컨텍스트 교체 후 작업은 재시도 예약,
+                # 마지막 시도였으면 목록 값만 채운 행 저장
+                print(f"      ❌ 워커{worker_id} 페이지 오류, 컨텍스트 교체 ({item.get('model_cd')}): {str(e)[:50]}")
+                _replace_context()
+                if job.attempts < job.max_attempts:
+                    raise
+                row, ok, tries = {k: str(item.get(k) or "") for k in detail_fields}, False, 1
+            wstats["retries"] += tries - 1
+            if not ok and job.attempts < job.max_attempts:
+                raise RuntimeError(f"상세 수집 실패 ({item.get('model_cd')})")
+            results.put(row)
+            if ok and store is not None:
+                store.put("heydealer", item.get("model_cd"), listing_fingerprint(item, HEYDEALER_FP_FIELDS), row)
+            wstats["done"] += 1
+            wstats["success" if ok else "failed"] += 1
+
+        try:
+            # 목록 샤드가 남았거나 재시도 대기 중인 상세가 있으면 계속 대기
+            run_worker(jobq, "heydealer", "detail", handle,
+                       keep_running=lambda: jobq.count_active("heydealer", "list_shard") > 0
+                       or jobq.count_active("heydealer", "detail") > 0)
+        finally:
+            browser.close()
+            jobq.close()
+
+
+def _run_queue_engine(matcher, list_csv, detail_csv):
+    """
+    [JOB_QUEUE] 목록 샤드·상세를 PostgreSQL 작업 큐로 여러 서버가 나눠 처리.
+    "all"이면 차종 목록을 읽어 오늘 날짜 샤드로 등록(이미 있으면 무시)한 뒤 워커로 참여
+    """
+    detail_fields = detail_csv.fieldnames
+    pnttm = datetime.now().strftime("%Y%m%d")
+    jobq = JobQueue()
+    jobq.ensure_schema()
+    profile = BlockingProfile() if BLOCK_RESOURCES else None
+    store = ListingStore() if SKIP_UNCHANGED else None
+
+    if JOB_QUEUE == "all":
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=HEADLESS)
+            page = new_list_context(browser, profile).new_page()
+            open_list_page(page)
+            try:
+                car_types = read_car_type_labels(page)
+            except Exception as e:
+                print(f"   ⚠️ 차체 옵션 읽기 실패: {e}")
+                car_types = []
+            browser.close()
+        car_types = car_types or [""]
+        n_new = jobq.enqueue_many("heydealer", "list_shard", [(f"{pnttm}:{t}", {"car_type": t}) for t in car_types])
+        print(f"\n📥 목록 샤드 {len(car_types)}개 중 {n_new}개 새로 등록 (작업 큐)")
+
+    results = queue.Queue()
+    writer_thread = threading.Thread(target=_detail_writer, args=(results, detail_csv), daemon=True)
+    writer_thread.start()
+
+    def _on_item(item):
+        list_csv.writerow(item)
+        cached = _reuse_detail(store, item) if store is not None else None
+        if cached is not None:
+            results.put(cached)
+            return
+        jobq.enqueue("heydealer", "detail", item, dedupe_key=f"{pnttm}:{item.get('model_cd')}")
+
+    sink = ListSink(on_item=_on_item, keep_items=False)
+    worker_stats = [{"done": 0, "success": 0, "failed": 0, "retries": 0} for _ in range(DETAIL_WORKERS)]
+    threads = [
+        threading.Thread(target=_queue_list_worker, args=(i + 1, sink, matcher, profile), daemon=True)
+        for i in range(max(1, LIST_WORKERS))
+    ] + [
+        threading.Thread(target=_queue_detail_worker, args=(i + 1, results, detail_fields, worker_stats[i], profile, store),
+                         daemon=True)
+        for i in range(DETAIL_WORKERS)
+    ]
+    print(f"\n🚀 작업 큐 워커 시작: 목록 {max(1, LIST_WORKERS)}개, 상세 {DETAIL_WORKERS}개 ({jobq.worker_id})")
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    results.put(None)
+    writer_thread.join()
+
+    print(f"\n[{datetime.now()}] ✅ 작업 큐 처리 종료")
+    print(f"   - 이 서버 목록: {len(sink)}개")
+    for i, ws in enumerate(worker_stats, 1):
+        print(f"   🧵 상세 워커{i}: 처리 {ws['done']}건 (성공 {ws['success']}, 실패 {ws['failed']}, 재시도 {ws['retries']}회)")
+    print(f"   - 큐 상태: 목록 샤드 {jobq.stats('heydealer', 'list_shard')}, 상세 {jobq.stats('heydealer', 'detail')}")
+    if store is not None:
+        print(f"   ♻️ 상세 재사용: {store.summary()}")
+        store.close()
+    if profile is not None:
+        print(f"   - 리소스 차단: {profile.summary()}")
+    jobq.close()
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    finally:
+        # 대기 중인 이미지 다운로드를 마저 끝내고 집계 출력
+        print(f"\n📷 남은 이미지 {_img_downloader.pending()}건 다운로드 마무리 중...")
+        _img_downloader.close()
+        print(f"📷 {_img_downloader.summary()}")
\ No newline at end of file
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+목록 카드 차량명 → 브랜드 매칭용 사전 컴파일 인덱스.
+
+heydealer_brand_list.csv의 model_name·brand_name을 정규화 토큰 trie로 만들어 두고,
+카드 제목 토큰을 한 번 훑으면서 가장 긴 모델명(없으면 브랜드명)을 찾습니다.
+인덱스는 brand CSV 옆에 pickle로 저장되며, CSV가 바뀌었을 때(크기·수정시각)만 다시 만듭니다.
+
+벤치마크·매칭률 리포트:
+    python heydealer/heydealer_brand_matcher.py [heydealer_list.csv]
+"""
+import csv
+import pickle
+import re
+import sys
+import time
+from pathlib import Path
+
+RESULT_DIR = Path(__file__).resolve().parent.parent / "result" / "heydealer"
+BRAND_LIST_FILE = RESULT_DIR / "heydealer_brand_list.csv"
+
+# trie 노드에서 매칭 결과를 담는 키 (토큰과 겹치지 않는 값)
+_END = "\0"
+# 같은 길이면 모델명 매칭이 브랜드명 매칭보다 우선
+_RANK_MODEL, _RANK_BRAND = 2, 1
+_PICKLE_VERSION = 1
+
+_SEP_RE = re.compile(r"[·∙ㆍ\s]+")
+
+
+def normalize_tokens(text):
+    """중점(·∙ㆍ)·공백 기준 분리 + 소문자화"""
+    return [t for t in _SEP_RE.split((text or "").strip().lower()) if t]
+
+
+class BrandMatcher:
+    def __init__(self):
+        self._root = {}
+        self.n_models = 0
+
+    def _add(self, name, info, rank):
+        tokens = normalize_tokens(name)
+        if not tokens:
+            return
+        node = self._root
+        for tok in tokens:
+            node = node.setdefault(tok, {})
+        # 같은 이름이 여러 번 나오면 먼저 들어온 값 유지 (기존 brand_by_name과 동일), 모델명이 브랜드명보다 우선
+        prev = node.get(_END)
+        if prev is None or prev[0] < rank:
+            node[_END] = (rank, info)
+
+    @classmethod
+    def from_rows(cls, rows):
+        m = cls()
+        for row in rows:
+            info = {"brand_id": row.get("brand_id", ""), "brand_name": (row.get("brand_name") or "").strip()}
+            model_name = (row.get("model_name") or "").strip()
+            if model_name:
+                m._add(model_name, info, _RANK_MODEL)
+                m.n_models += 1
+            if info["brand_name"]:
+                m._add(info["brand_name"], info, _RANK_BRAND)
+        return m
+
+    def match(self, title):
+        """제목에서 가장 긴 모델명(같으면 먼저 나온 것) → 없으면 브랜드명 매칭. {brand_id, brand_name} 또는 None"""
+        tokens = normalize_tokens(title)
+        best, best_key = None, (0, 0)
+        root = self._root
+        for i in range(len(tokens)):
+            node = root
+            for j in range(i, len(tokens)):
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                hit = node.get(_END)
+                if hit is not None:
+                    key = (hit[0], j - i + 1)
+                    if key > best_key:
+                        best, best_key = hit[1], key
+        return best
+
+    def __len__(self):
+        return self.n_models
+
+
+def _signature(path):
+    st = Path(path).stat()
+    return (_PICKLE_VERSION, st.st_size, st.st_mtime_ns)
+
+
+def matcher_cache_path(brand_file):
+    return Path(brand_file).with_suffix(".matcher.pkl")
+
+
+def load_matcher(brand_file=BRAND_LIST_FILE):
+    """brand CSV 기반 BrandMatcher. 저장된 pickle이 CSV와 같은 버전이면 재사용, 아니면 새로 만들어 저장."""
+    brand_file = Path(brand_file)
+    if not brand_file.exists():
+        print(f"⚠️ 매핑 파일이 없습니다: {brand_file}")
+        return BrandMatcher()
+    sig = _signature(brand_file)
+    cache_file = matcher_cache_path(brand_file)
+    if cache_file.exists():
+        try:
+            with open(cache_file, "rb") as f:
+                cached_sig, root, n_models = pickle.load(f)
+            if cached_sig == sig:
+                matcher = BrandMatcher()
+                matcher._root, matcher.n_models = root, n_models
+                return matcher
+        except Exception:
+            pass
+    with open(brand_file, "r", encoding="utf-8-sig", newline="") as f:
+        matcher = BrandMatcher.from_rows(csv.DictReader(f))
+    try:
+        with open(cache_file, "wb") as f:
+            # 클래스가 아닌 trie dict만 저장 (스크립트/모듈 어느 쪽에서 만들어도 로드 가능)
+            pickle.dump((sig, matcher._root, matcher.n_models), f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass
+    return matcher
+
+
+def _legacy_match(raw_model_name, brand_map, brand_by_name):
+    """기존 _extract_card_heydealer의 3단계 매칭 (벤치마크 비교용)"""
+    matched = brand_map.get(raw_model_name)
+    if not matched and " " in raw_model_name:
+        matched = brand_map.get(raw_model_name.split(" ", 1)[1].strip())
+    if not matched and brand_by_name:
+        for word in raw_model_name.replace("·", " ").split():
+            if word.strip() and brand_by_name.get(word.strip()):
+                return brand_by_name[word.strip()]
+    return matched
+
+
+def benchmark(list_file, brand_file=BRAND_LIST_FILE, repeat=20):
+    """list CSV의 model_name으로 카드 1건당 매칭 비용·매칭률 비교 출력"""
+    with open(list_file, "r", encoding="utf-8-sig", newline="") as f:
+        titles = [(r.get("model_name") or "").strip() for r in csv.DictReader(f)]
+    with open(brand_file, "r", encoding="utf-8-sig", newline="") as f:
+        brand_rows = list(csv.DictReader(f))
+    if not titles:
+        print("⚠️ 제목이 없습니다.")
+        return
+
+    t0 = time.perf_counter()
+    brand_map, brand_by_name = {}, {}
+    for row in brand_rows:
+        info = {"brand_id": row.get("brand_id", ""), "brand_name": (row.get("brand_name") or "").strip()}
+        if (row.get("model_name") or "").strip():
+            brand_map[row["model_name"].strip()] = info
+        if info["brand_name"] and info["brand_name"] not in brand_by_name:
+            brand_by_name[info["brand_name"]] = info
+    t_legacy_build = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    matcher = load_matcher(brand_file)
+    t_load = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        legacy = [_legacy_match(t, brand_map, brand_by_name) for t in titles]
+    t_legacy = (time.perf_counter() - t0) / (repeat * len(titles))
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        compiled = [matcher.match(t) for t in titles]
+    t_compiled = (time.perf_counter() - t0) / (repeat * len(titles))
+
+    n = len(titles)
+    n_legacy = sum(1 for m in legacy if m)
+    n_compiled = sum(1 for m in compiled if m)
+    changed = sum(1 for a, b in zip(legacy, compiled) if a and b and a["brand_id"] != b["brand_id"])
+    print(f"카드 {n:,}건 / 모델 {matcher.n_models:,}개")
+    print(f"  기존 매칭: 사전 구성 {t_legacy_build * 1000:.1f}ms, 카드당 {t_legacy * 1e6:.2f}µs, 매칭률 {n_legacy / n * 100:.1f}%")
+    print(f"  인덱스  : 로드 {t_load * 1000:.1f}ms,  카드당 {t_compiled * 1e6:.2f}µs, 매칭률 {n_compiled / n * 100:.1f}%")
+    print(f"  브랜드가 달라진 카드: {changed}건")
+    unmatched = sorted({t for t, m in zip(titles, compiled) if not m})
+    if unmatched:
+        print(f"  미매칭 제목 (최대 20개): {unmatched[:20]}")
+
+
+if __name__ == "__main__":
+    benchmark(Path(sys.argv[1]) if len(sys.argv) > 1 else RESULT_DIR / "heydealer_list.csv")
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+헤이딜러 car_meta API(브랜드 → 모델그룹 → 모델) 계층 수집 공용 모듈.
+crawl_heydealer_brand.py, crawl_heydealer_type_to_list.py 에서 함께 사용합니다.
+
+/brands/{id}/, /model_groups/{id}/ 호출은 스레드 풀로 병렬 요청하고(동시 요청 수 = max_workers),
+결과는 API가 내려준 브랜드·모델그룹·모델 순서 그대로 조립하므로 CSV 행 순서는 직렬 수집과 같습니다.
+cache(HttpCache)를 넘기면 응답을 cache/heydealer_car_meta/ 에 저장해 두고 TTL·ETag 재검증으로 재사용합니다.
+
+refresh_brand_hierarchy()는 이전 brand CSV를 기준으로 /brands/, /brands/{id}/ 만 다시 확인하고
+새로 생기거나 바뀐 모델그룹, 마지막 확인 후 MODEL_GROUP_RECHECK_SECS가 지난 모델그룹만 /model_groups/{id}/ 를
+호출합니다 (추가·삭제·이름변경 모델은 delta로 반환). 모델그룹 항목이 그대로여도 안의 모델은 바뀔 수 있어서
+주기적으로 다시 확인합니다.
+"""
+import csv
+import hashlib
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common.http_cache import HttpCache
+from common.rate_limiter import request_with_retry
+
+API_BASE = "https://api.heydealer.com/v2/customers/web/market/car_meta"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+
+# 브랜드 CSV 컬럼 (날짜 정보를 끝에 배치)
+BRAND_CSV_FIELDS = [
+    "brand_id", "brand_name", "model_group_id", "model_group_name",
+    "model_id", "model_name", "production_period", "data_crtr_pnttm", "create_dt"
+]
+
+# 동시 요청 상한 (브랜드·모델그룹 API 병렬 호출 수)
+MAX_WORKERS = 8
+
+# 증분 갱신 결과 파일 컬럼 (brand CSV 옆에 heydealer_brand_delta.csv 로 저장)
+DELTA_CSV_FIELDS = [
+    "change_type", "brand_id", "brand_name", "model_group_id", "model_group_name",
+    "model_id", "model_name", "prev_model_name", "data_crtr_pnttm", "create_dt"
+]
+# 모델그룹 변경 판단(fingerprint)에서 제외할 키: 매물 수처럼 매일 바뀌는 값
+VOLATILE_MG_KEYS = {"count", "car_count"}
+# fingerprint가 같아도 이 시간(초)이 지난 모델그룹은 /model_groups/{id}/ 를 다시 호출
+# (모델그룹 항목에는 모델 목록이 없어 그룹 안의 모델 추가·이름변경은 fingerprint로 알 수 없음)
+MODEL_GROUP_RECHECK_SECS = 7 * 24 * 60 * 60
+
+# 응답 캐시 위치·TTL (초). TTL 안이면 요청 없음, 지나면 ETag/Last-Modified 조건부 요청
+CACHE_DIR = Path(__file__).resolve().parent.parent / "cache" / "heydealer_car_meta"
+CACHE_TTL = 24 * 60 * 60
+
+_default_logger = logging.getLogger(__name__)
+
+
+def create_session(max_workers=MAX_WORKERS):
+    """car_meta API용 Session. 워커 수만큼 keep-alive 커넥션을 유지하도록 풀 크기 설정."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "User-Agent": USER_AGENT,
+        "Accept": "application/json",
+    })
+    return session
+
+
+def create_cache(ttl=CACHE_TTL):
+    """car_meta 응답용 디스크 캐시"""
+    return HttpCache(CACHE_DIR, default_ttl=ttl)
+
+
+def _get_json(session, url, timeout, cache=None, ttl=None):
+    """
+    호스트 속도 제한·재시도(+ 캐시가 있으면 캐시)를 거쳐 GET 후 JSON 반환.
+    404(삭제된 브랜드/모델그룹)만 None으로 건너뛰고, 재시도 후에도 실패한 429/5xx 등은 예외로 올려 데이터 누락을 막음.
+    """
+    if cache is not None:
+        resp = cache.get(session, url, ttl=ttl, timeout=timeout)
+    else:
+        resp = request_with_retry(session, "GET", url, timeout=timeout)
+    if resp.status_code == 404:
+        return None
+    resp.raise_for_status()
+    return resp.json()
+
+
+def _as_brand_list(raw):
+    """/brands/ 응답이 list 또는 {"brands"|"data": [...]} 형태 모두 대응"""
+    if isinstance(raw, list):
+        return raw
+    if isinstance(raw, dict):
+        return raw.get("brands") or raw.get("data") or []
+    return []
+
+
+def model_group_fingerprint(mg):
+    """/brands/{id}/ 의 model_groups 항목 fingerprint (VOLATILE_MG_KEYS 제외)"""
+    stable = {k: v for k, v in mg.items() if k not in VOLATILE_MG_KEYS}
+    return hashlib.sha1(json.dumps(stable, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _walk_hierarchy(session, log, max_workers, timeout, cache, ttl, reuse_rows):
+    """
+    브랜드 → 모델그룹 → 모델 순회 공통 로직.
+    reuse_rows(brand, mg)가 행 리스트를 돌려주면 /model_groups/{id}/ 호출 없이 그 행을 쓰고, None이면 API 호출.
+    반환: (rows, {model_group_id: fingerprint}, 실제 호출한 모델그룹 수)
+    """
+    now = datetime.now()
+    d_pnttm, c_dt = now.strftime("%Y%m%d"), now.strftime("%Y%m%d%H%M")
+
+    brands = _as_brand_list(_get_json(session, f"{API_BASE}/brands/", timeout, cache, ttl))
+    n_brands = len(brands)
+    log.info(f"총 {n_brands}개 브랜드 데이터 수집 시작 (동시 요청 {max_workers}개)")
+
+    fingerprints = {}
+    n_fetched = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        brand_futures = [
+            pool.submit(_get_json, session, f"{API_BASE}/brands/{b.get('hash_id')}/", timeout, cache, ttl)
+            for b in brands
+        ]
+        # 브랜드 순서대로 결과를 받으며 모델그룹 요청 제출 → (brand, [(mg, future 또는 재사용 행), ...]) 순서 보존
+        plan = []
+        for b_idx, (brand, fut) in enumerate(zip(brands, brand_futures), 1):
+            log.info(f"[{b_idx}/{n_brands}] 브랜드 처리 중: {brand.get('name')}")
+            data = fut.result()
+            if data is None:
+                log.warning(f"   ⚠️ 브랜드 상세 응답 없음: {brand.get('name')}")
+                continue
+            mg_jobs = []
+            for mg in data.get("model_groups", []):
+                fingerprints[mg.get("hash_id")] = model_group_fingerprint(mg)
+                reused = reuse_rows(brand, mg)
+                if reused is None:
+                    n_fetched += 1
+                    reused = pool.submit(_get_json, session, f"{API_BASE}/model_groups/{mg.get('hash_id')}/", timeout, cache, ttl)
+                mg_jobs.append((mg, reused))
+            plan.append((brand, mg_jobs))
+
+        rows = []
+        for brand, mg_jobs in plan:
+            for mg, job in mg_jobs:
+                if isinstance(job, list):
+                    # 변경 없는 모델그룹: 이전 행 재사용 (이름·날짜만 이번 수집 기준으로 갱신)
+                    for prev in job:
+                        rows.append({**prev, "brand_name": brand.get("name"), "model_group_name": mg.get("name"),
+                                     "data_crtr_pnttm": d_pnttm, "create_dt": c_dt})
+                    continue
+                data = job.result()
+                if data is None:
+                    log.warning(f"   ⚠️ 모델그룹 응답 없음: {brand.get('name')} / {mg.get('name')}")
+                    continue
+                for model in data.get("models", []):
+                    rows.append({
+                        "brand_id": brand.get("hash_id"),
+                        "brand_name": brand.get("name"),
+                        "model_group_id": mg.get("hash_id"),
+                        "model_group_name": mg.get("name"),
+                        "model_id": model.get("hash_id", ""),
+                        "model_name": model.get("name", ""),
+                        "production_period": model.get("period", ""),
+                        "data_crtr_pnttm": d_pnttm,  # 8자리 날짜
+                        "create_dt": c_dt,           # 12자리 날짜 (creat_de 매칭)
+                    })
+    if cache is not None:
+        log.info(cache.summary())
+    return rows, fingerprints, n_fetched
+
+
+def fetch_brand_snapshot(session=None, logger=None, max_workers=MAX_WORKERS, timeout=15, cache=None):
+    """
+    브랜드-모델 계층 전체를 수집해 (BRAND_CSV_FIELDS 형태의 dict 리스트, 스냅샷 state) 반환.
+    state는 save_snapshot_state로 저장하면 다음 refresh_brand_hierarchy의 기준이 됩니다.
+
+    [Step 1] /brands/ 는 1회 직렬 호출, [Step 2] /brands/{id}/ 와 [Step 3] /model_groups/{id}/ 는
+    스레드 풀에서 병렬 호출합니다. 브랜드 상세가 도착하는 대로 해당 모델그룹 요청을 바로 넣어 풀을 계속 채웁니다.
+    """
+    log = logger or _default_logger
+    session = session or create_session(max_workers)
+    rows, fingerprints, _ = _walk_hierarchy(session, log, max_workers, timeout, cache, None, lambda brand, mg: None)
+    now = time.time()
+    return rows, {"model_groups": fingerprints, "checked_at": {mg_id: now for mg_id in fingerprints}}
+
+
+def fetch_brand_hierarchy(session=None, logger=None, max_workers=MAX_WORKERS, timeout=15, cache=None):
+    """브랜드-모델 계층 전체를 수집해 BRAND_CSV_FIELDS 형태의 dict 리스트로 반환 (fetch_brand_snapshot 참고)"""
+    rows, _ = fetch_brand_snapshot(session, logger, max_workers, timeout, cache)
+    return rows
+
+
+def state_path_for(brand_file):
+    """brand CSV 옆 모델그룹 fingerprint 파일 경로"""
+    return Path(brand_file).with_name(Path(brand_file).stem + "_state.json")
+
+
+def delta_path_for(brand_file):
+    """brand CSV 옆 delta CSV 경로"""
+    return Path(brand_file).with_name(Path(brand_file).stem.replace("_list", "") + "_delta.csv")
+
+
+def load_snapshot(brand_file):
+    """
+    이전 brand CSV 행과 state json 로드 → (rows, state).
+    state: {"model_groups": {모델그룹 id: fingerprint}, "checked_at": {모델그룹 id: 마지막 호출 시각(epoch)}}
+    (파일이 없거나 깨졌으면 빈 dict들)
+    """
+    brand_file = Path(brand_file)
+    rows, state = [], {}
+    if brand_file.exists():
+        with open(brand_file, "r", encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.DictReader(f))
+    state_file = state_path_for(brand_file)
+    if state_file.exists():
+        try:
+            with open(state_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+    return rows, {"model_groups": state.get("model_groups", {}), "checked_at": state.get("checked_at", {})}
+
+
+def save_snapshot_state(brand_file, state):
+    """fetch_brand_snapshot / refresh_brand_hierarchy가 돌려준 state를 brand CSV 옆 json으로 저장"""
+    with open(state_path_for(brand_file), "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=1)
+
+
+def diff_models(prev_rows, new_rows):
+    """model_id 기준 추가(added)·삭제(removed)·이름변경(renamed) 행 리스트 (DELTA_CSV_FIELDS 형태)"""
+    prev_by_id = {r.get("model_id"): r for r in prev_rows if r.get("model_id")}
+    new_by_id = {r.get("model_id"): r for r in new_rows if r.get("model_id")}
+    delta = []
+    for model_id, r in new_by_id.items():
+        prev = prev_by_id.get(model_id)
+        if prev is None:
+            delta.append({**r, "change_type": "added", "prev_model_name": ""})
+        elif (prev.get("model_name") or "") != (r.get("model_name") or ""):
+            delta.append({**r, "change_type": "renamed", "prev_model_name": prev.get("model_name", "")})
+    if new_rows:
+        d_pnttm, c_dt = new_rows[0]["data_crtr_pnttm"], new_rows[0]["create_dt"]
+        for model_id, prev in prev_by_id.items():
+            if model_id not in new_by_id:
+                delta.append({**prev, "change_type": "removed", "prev_model_name": prev.get("model_name", ""),
+                              "data_crtr_pnttm": d_pnttm, "create_dt": c_dt})
+    return delta
+
+
+def save_delta_csv(brand_file, delta):
+    path = delta_path_for(brand_file)
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.DictWriter(f, fieldnames=DELTA_CSV_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(delta)
+    return path
+
+
+def refresh_brand_hierarchy(brand_file, session=None, logger=None, max_workers=MAX_WORKERS, timeout=15, cache=None,
+                            recheck_secs=MODEL_GROUP_RECHECK_SECS):
+    """
+    증분 갱신: 이전 brand CSV(brand_file)를 읽어 변경분만 재수집.
+
+    /brands/, /brands/{id}/ 는 매번 확인(캐시가 있으면 ETag 조건부 요청)하고, 모델그룹은
+    새로 생겼거나 fingerprint가 달라졌거나 마지막 확인 후 recheck_secs가 지난 경우에만 /model_groups/{id}/ 를 호출합니다.
+    (state json에 확인 시각이 없는 모델그룹은 한 번 다시 호출)
+    반환: (rows, delta, state) — 저장은 호출 측에서 (save_delta_csv, save_snapshot_state)
+    """
+    log = logger or _default_logger
+    session = session or create_session(max_workers)
+    prev_rows, prev_state = load_snapshot(brand_file)
+    prev_fps, prev_checked = prev_state["model_groups"], prev_state["checked_at"]
+    prev_by_mg = {}
+    for r in prev_rows:
+        prev_by_mg.setdefault(r.get("model_group_id"), []).append(r)
+    now = time.time()
+    reused_ids = set()
+
+    def reuse_rows(brand, mg):
+        mg_id = mg.get("hash_id")
+        prev = prev_by_mg.get(mg_id)
+        if not prev or prev_fps.get(mg_id) != model_group_fingerprint(mg):
+            return None
+        if now - prev_checked.get(mg_id, 0) >= recheck_secs:
+            return None
+        reused_ids.add(mg_id)
+        return prev
+
+    # 확인용 요청은 항상 재검증(ttl=0) → 바뀐 게 없으면 304
+    rows, fingerprints, n_fetched = _walk_hierarchy(session, log, max_workers, timeout, cache, 0, reuse_rows)
+    checked_at = {mg_id: prev_checked[mg_id] if mg_id in reused_ids else now for mg_id in fingerprints}
+    delta = diff_models(prev_rows, rows)
+    log.info(f"증분 갱신: 모델그룹 {len(fingerprints)}개 중 {n_fetched}개 재수집, "
+             f"변경 모델 {len(delta)}건 (추가 {sum(d['change_type'] == 'added' for d in delta)} / "
+             f"삭제 {sum(d['change_type'] == 'removed' for d in delta)} / "
+             f"이름변경 {sum(d['change_type'] == 'renamed' for d in delta)})")
+    return rows, delta, {"model_groups": fingerprints, "checked_at": checked_at}
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+헤이딜러 상세 페이지 스펙·옵션·출고 정보·추천 코멘트를 page.evaluate 1회로 읽는 추출기.
+
+- SPEC_JS: 페이지 안에서 스펙 항목(.css-113wzqa)의 라벨/값 쌍과 각 섹션 텍스트를 한 번에 모아 객체로 반환.
+  install_spec_extractor(context)로 컨텍스트당 한 번 주입(add_init_script)해 두고 read_spec(page)로 호출합니다.
+- SPEC_LABEL_MAP: 라벨 → detail 컬럼 선언 (위에서부터 처음 맞는 규칙, 이미 채워진 컬럼은 건너뜀).
+  기존 _fill_spec_from_items의 elif 체인과 같은 순서·조건입니다.
+"""
+
+# 스펙 항목 1개당 query_selector·inner_text 여러 번 하던 것을 페이지 안에서 한 번에 처리
+_SPEC_FN = """
+() => {
+    const text = (el) => (el ? (el.innerText || el.textContent || "").trim() : "");
+    const spec = [];
+    for (const item of document.querySelectorAll(".css-113wzqa")) {
+        const lbl = item.querySelector(".css-1b7o1k1");
+        if (!lbl) continue;
+        const val = item.querySelector(".css-1b7o1k1 + div") || lbl.nextElementSibling;
+        spec.push([text(lbl).replace(/ /g, ""), text(val)]);
+    }
+    const options = [];
+    for (const el of document.querySelectorAll(".css-5pr39e .css-13wylk3, .css-5pr39e .css-1396o7r")) {
+        const t = text(el);
+        if (t) options.push(t);
+    }
+    let delivery = "";
+    for (const c of document.querySelectorAll(".css-1cfq7ri")) {
+        if ((c.innerText || "").includes("출고 정보")) {
+            const v = c.querySelector(".css-1n3oo4w");
+            if (v) { delivery = text(v); break; }
+        }
+    }
+    return {
+        spec: spec,
+        options: options,
+        delivery: delivery,
+        recommendation: text(document.querySelector(".css-yfldxx")),
+    };
+}
+"""
+SPEC_JS = f"window.__heydealerSpec = {_SPEC_FN};"
+
+# (컬럼, 라벨에 모두 포함될 문자열, 포함되면 안 되는 문자열) — 라벨은 공백 제거 후 비교
+SPEC_LABEL_MAP = [
+    ("year", ("연식",), ()),
+    ("km", ("주행거리",), ()),
+    ("refund", ("환불",), ()),
+    ("guarantee", ("헤이딜러보증",), ()),
+    ("accident", ("사고",), ()),
+    ("inner_car_wash", ("실내세차",), ()),
+    ("insurance", ("자차보험처리",), ()),
+    ("exterior_description", ("외부",), ()),
+    ("interior_description", ("실내",), ("세차",)),
+    ("tire", ("타이어",), ()),
+    ("tinting", ("틴팅",), ()),
+    ("car_key", ("차키",), ()),
+]
+
+
+def install_spec_extractor(context):
+    """BrowserContext에 추출 함수 주입 (이후 열리는 모든 페이지·이동에 적용)"""
+    context.add_init_script(SPEC_JS)
+    return context
+
+
+def read_spec(page):
+    """추출 결과 {spec: [[라벨, 값], ...], options: [...], delivery, recommendation}. 주입 전 페이지면 함수를 직접 실행"""
+    data = page.evaluate("() => window.__heydealerSpec ? window.__heydealerSpec() : null")
+    if data is None:
+        data = page.evaluate(_SPEC_FN)
+    return data or {}
+
+
+def apply_spec(res, data):
+    """read_spec 결과를 detail 행(res)에 채움. 비어 있는 컬럼만 채우며 채운 스펙 항목 수 반환"""
+    if data.get("options") and not res.get("options"):
+        res["options"] = ", ".join(data["options"])
+    if data.get("delivery") and not res.get("delivery_information"):
+        res["delivery_information"] = data["delivery"].replace("\n", " | ").strip()
+    if data.get("recommendation") and not res.get("recommendation_comment"):
+        res["recommendation_comment"] = data["recommendation"].replace("\n", " | ").strip()
+    filled = 0
+    for lbl, val in data.get("spec", []):
+        val = str(val or "").strip()
+        if not val:
+            continue
+        for col, includes, excludes in SPEC_LABEL_MAP:
+            if res.get(col):
+                continue
+            if all(s in lbl for s in includes) and not any(s in lbl for s in excludes):
+                res[col] = val
+                filled += 1
+                break
+    return filled
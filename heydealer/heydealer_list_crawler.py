@@ -0,0 +1,464 @@
+#!/usr/bin/env python3
+"""
+헤이딜러 목록(무한 스크롤) 수집 공용 모듈.
+crawl_heydealer_type_to_list.py, crawl_heydealer_list_detail_brand.py 의 [1단계] 목록 수집에서 함께 사용합니다.
+
+- 차체(차종) 오버레이 열기·차종 선택은 클래스명 없이 텍스트·구조만 사용 (클래스 변경에 강함)
+- crawl_list(): 차종별 목록 수집. workers > 1 이면 차종마다 독립된 BrowserContext에서 병렬 수집하고,
+  모든 워커가 ListSink 하나(href 기준 중복 제거, model_sn 순번, CSV 저장 콜백)를 공유합니다.
+- DOM 카드는 라운드마다 page.evaluate 1회로 새로 붙은 카드만 읽습니다 (read_new_cards, data-crawled 표시).
+"""
+import queue
+import re
+import threading
+import time
+from datetime import datetime
+
+from playwright.sync_api import sync_playwright
+
+from common.rate_limiter import get_limiter, wait_before_retry
+from heydealer_market_api import XhrListCollector, car_hash_id, card_from_api
+
+BASE_URL = "https://www.heydealer.com"
+LIST_URL = f"{BASE_URL}/market/cars"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+VIEWPORT = {'width': 1920, 'height': 1080}
+HIDE_WEBDRIVER_JS = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+
+# 정규화 후 비교용 (중점·공백 표기 차이 무시: SUV · RV, SUV∙RV, 경 · 소형 등)
+CANONICAL_CAR_BODY = {"경∙소형", "세단", "SUV∙RV", "쿠페", "리무진", "컨버터블", "해치백"}
+_VIEW_BTN_RE = re.compile(r"[\d,]+대\s*보기")
+
+# ----- 스크롤 대기 (ScrollLoader) -----
+# 스크롤 후 카드 수·문서 높이 증가 또는 목록 API 응답 도착 즉시 다음 단계로 진행, 아무 변화가 없으면 SCROLL_IDLE_MS 후 종료
+SCROLL_IDLE_MS = 1500
+# 변화 감지 후 같은 묶음의 나머지 카드가 그려질 때까지 잠깐 대기
+SCROLL_SETTLE_MS = 250
+SCROLL_POLL_MS = 100
+# 변화 없을 때 페이지 끝 확인용 추가 대기 (최대)
+END_CONFIRM_MS = 1500
+# 절약 시간 계산 기준: 기존 고정 대기 (스크롤 2500ms, 끝 확인 2000ms)
+_FIXED_SCROLL_MS, _FIXED_END_MS = 2500, 2000
+
+
+def get_now_times():
+    now = datetime.now()
+    return now.strftime("%Y%m%d"), now.strftime("%Y%m%d%H%M")
+
+
+def new_list_context(browser, profile=None):
+    """목록·상세 수집용 BrowserContext (UA·뷰포트·webdriver 은닉). profile(BlockingProfile)이 있으면 리소스 차단 적용"""
+    context = browser.new_context(user_agent=USER_AGENT, viewport=VIEWPORT)
+    context.add_init_script(HIDE_WEBDRIVER_JS)
+    if profile is not None:
+        profile.apply(context)
+    return context
+
+
+def open_list_page(page, list_url=LIST_URL):
+    """목록 페이지 접속 (최대 3회 재시도)"""
+    for nav_try in range(3):
+        try:
+            get_limiter().acquire(list_url)
+            page.goto(list_url, wait_until="commit", timeout=60000)
+            page.wait_for_load_state("domcontentloaded", timeout=15000)
+            break
+        except Exception as e:
+            if nav_try < 2:
+                print(f"   ⚠️ 목록 페이지 재시도 ({nav_try + 2}/3)...")
+                wait_before_retry(nav_try + 1, list_url)
+            else:
+                raise RuntimeError(f"목록 페이지 접속 실패: {list_url}") from e
+    page.wait_for_timeout(3000)
+
+
+def normalize_car_label(txt):
+    """차종 텍스트 정규화: 공백·다양한 중점(·∙) 통일 후 비교"""
+    if not txt:
+        return ""
+    s = (txt or "").strip()
+    s = re.sub(r"\s*[·∙]\s*", "∙", s)  # ' · ' / '∙' -> '∙'
+    s = re.sub(r"\s+", " ", s).strip()
+    return s
+
+
+def open_car_body_panel(page):
+    """차체 탭: 텍스트 '차체'인 버튼 클릭 (클래스 무관)"""
+    tab = page.get_by_role("button", name="차체")
+    if tab.count() == 0:
+        tab = page.locator("#root button").filter(has_text=re.compile(r"^차체$"))
+    if tab.count() == 0:
+        # 폴백: 필터 영역 6번째 버튼 (차체가 6번째인 경우)
+        tab = page.locator("#root button[type='button']").nth(5)
+    if tab.count() > 0:
+        tab.first.scroll_into_view_if_needed()
+        tab.first.click(force=True)
+        page.wait_for_timeout(600)
+
+
+def get_car_body_overlay(page):
+    """차체 오버레이: '차체' 문구와 'N대 보기' 버튼이 함께 있는 컨테이너 (클래스 무관)"""
+    overlay = page.locator("div").filter(
+        has=page.locator("button").filter(has_text=_VIEW_BTN_RE)
+    ).filter(has=page.get_by_text("차체"))
+    return overlay.first
+
+
+def get_car_type_labels_from_overlay(overlay):
+    """오버레이 안에서 차종 버튼 텍스트만 수집 (순서 유지). 정규화 후 CANONICAL과 매칭, 클릭용으로는 페이지의 실제 텍스트 사용."""
+    labels = []
+    try:
+        for node in overlay.locator("button").all():
+            raw = (node.inner_text() or "").strip()
+            if not raw or _VIEW_BTN_RE.match(raw) or raw == "초기화":
+                continue
+            canonical = normalize_car_label(raw)
+            if canonical in CANONICAL_CAR_BODY:
+                labels.append(raw)
+    except Exception:
+        pass
+    return labels
+
+
+def read_car_type_labels(page, attempts=2):
+    """차체 오버레이를 열어 차종 라벨 목록을 읽고 닫음. 못 읽으면 빈 리스트"""
+    open_car_body_panel(page)
+    page.wait_for_timeout(1500)
+    labels = []
+    for attempt in range(attempts):
+        overlay = get_car_body_overlay(page)
+        if overlay.count() > 0:
+            labels = get_car_type_labels_from_overlay(overlay)
+            if labels:
+                break
+        if attempt < attempts - 1:
+            page.wait_for_timeout(1200)
+    page.keyboard.press("Escape")
+    page.wait_for_timeout(1000)
+    return labels
+
+
+def select_car_type(page, car_type, prev_car_type=None):
+    """
+    차체 오버레이에서 (prev_car_type 해제 후) car_type 선택 → 'N대 보기' 적용. 성공 시 True.
+    새 컨텍스트에서 처음 선택하는 경우 prev_car_type=None.
+    """
+    for _attempt in range(2):
+        try:
+            if _attempt > 0:
+                page.keyboard.press("Escape")
+                page.wait_for_timeout(800)
+            open_car_body_panel(page)
+            page.wait_for_timeout(700)
+            overlay = get_car_body_overlay(page)
+            if overlay.count() == 0:
+                raise RuntimeError("차체 오버레이를 찾을 수 없음")
+            # 이전 차종 해제 후 현재 차종 선택 (텍스트로 버튼 찾기)
+            if prev_car_type:
+                prev_btn = overlay.locator("button").filter(has_text=re.compile(re.escape(prev_car_type)))
+                if prev_btn.count() > 0:
+                    prev_btn.first.scroll_into_view_if_needed()
+                    prev_btn.first.click(force=True)
+                    page.wait_for_timeout(400)
+            btn = overlay.locator("button").filter(has_text=re.compile(re.escape(car_type)))
+            if btn.count() == 0:
+                print(f"   ⚠️ [{car_type}] 차종 버튼 없음, 건너뜀")
+                return False
+            btn.first.scroll_into_view_if_needed()
+            page.wait_for_timeout(200)
+            btn.first.click(force=True)
+            page.wait_for_timeout(600)
+            view_btn = overlay.locator("button").filter(has_text=_VIEW_BTN_RE)
+            if view_btn.count() > 0:
+                view_btn.first.click()
+                page.wait_for_timeout(2500)
+            else:
+                page.wait_for_timeout(1500)
+            print(f" 🔘 차종 선택·적용: {car_type} → 목록 수집 시작")
+            return True
+        except Exception as e:
+            print(f"   ⚠️ 차종 선택/보기 실패 ({car_type}), 재시도 예정: {e}")
+    return False
+
+
+# 지난 라운드 이후 새로 붙은 카드만 한 번에 읽어오는 스크립트 (읽은 카드는 data-crawled 표시)
+# 카드당 CDP 왕복(query_selector·get_attribute·inner_text) 대신 라운드당 evaluate 1회
+_NEW_CARDS_JS = """
+() => {
+    const txt = (el) => (el ? (el.innerText || "").trim() : "");
+    const out = [];
+    for (const a of document.querySelectorAll('a[href^="/market/cars/"]:not([data-crawled])')) {
+        a.setAttribute("data-crawled", "1");
+        const box = a.querySelector(".css-9j6363");
+        const names = box ? box.querySelectorAll(".css-jk6asd") : [];
+        const priceArea = a.querySelector(".css-105xtr1 .css-1066lcq .css-dbu2tk");
+        const sale = priceArea ? priceArea.querySelector(".css-8sjynn") : null;
+        out.push({
+            href: a.getAttribute("href") || "",
+            model_name: txt(names[0]),
+            model_second_name: txt(names[1]),
+            grade_name: box ? txt(box.querySelector(".css-13wylk3")) : "",
+            year_km: txt(a.querySelector(".css-6bza35")),
+            sale_price: sale ? txt(sale) : txt(priceArea),
+        });
+    }
+    return out;
+}
+"""
+
+
+def read_new_cards(page):
+    """새로 나타난 목록 카드 원본 값 리스트 (evaluate 1회)"""
+    return page.evaluate(_NEW_CARDS_JS)
+
+
+def card_from_dom(raw, matcher, car_type="") -> dict:
+    """read_new_cards 원소 1개 → 목록 행 dict (model_sn은 ListSink.append에서 부여)"""
+    href = raw.get("href") or ""
+    full_url = (BASE_URL + href).split("?")[0] if not href.startswith("http") else href.split("?")[0]
+    raw_model_name = raw.get("model_name", "")
+    data = {
+        "model_sn": "", "brand_id": "", "brand_name": "", "car_type": car_type,
+        "model_cd": full_url.split("/")[-1],
+        "detail_url": full_url,
+        "model_name": raw_model_name,
+        "model_second_name": raw.get("model_second_name", ""),
+        "grade_name": raw.get("grade_name", ""),
+    }
+    matched = matcher.match(raw_model_name)
+    if matched:
+        data["brand_id"], data["brand_name"] = matched["brand_id"], matched["brand_name"]
+    txt = raw.get("year_km", "")
+    if txt:
+        if "ㆍ" in txt:
+            p = txt.split("ㆍ")
+            data["year"], data["km"] = p[0].strip(), p[1].strip()
+        else: data["year"], data["km"] = txt, ""
+    if raw.get("sale_price"):
+        data["sale_price"] = raw["sale_price"]
+    d_pnttm, c_dt = get_now_times()
+    data["date_crtr_pnttm"], data["create_dt"] = d_pnttm, c_dt
+    return data
+
+
+class ListSink:
+    """
+    목록 워커들이 공유하는 결과 저장소 (스레드 안전).
+    claim(href)로 중복 여부를 먼저 확인하고(추출 전), append(item)에서 model_sn 부여 + on_item 콜백(CSV 저장 등) 호출.
+    keep_items=False 이면 행을 메모리에 모아두지 않고 건수만 셉니다 (on_item으로 바로 흘려보내는 파이프라인용).
+    """
+
+    def __init__(self, on_item=None, keep_items=True):
+        self.items = []
+        self.seen = set()
+        self.on_item = on_item
+        self.keep_items = keep_items
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def claim(self, href):
+        with self._lock:
+            if not href or href in self.seen:
+                return False
+            self.seen.add(href)
+            return True
+
+    def append(self, item):
+        with self._lock:
+            self._count += 1
+            item["model_sn"] = self._count
+            if self.keep_items:
+                self.items.append(item)
+            if self.on_item:
+                self.on_item(item)
+            return item
+
+    def __len__(self):
+        return self._count
+
+
+class ScrollLoader:
+    """
+    무한 스크롤 1회 = 맨 아래로 스크롤 후 '새 카드/높이 증가/목록 API 응답' 중 하나가 생길 때까지만 대기.
+    고정 대기(wait_for_timeout 2500·2000) 대비 절약한 시간을 누적합니다.
+    """
+    _STATE_JS = "() => [document.querySelectorAll('a[href^=\"/market/cars/\"]').length, document.body.scrollHeight]"
+
+    def __init__(self, page, xhr=None):
+        self.page = page
+        self.xhr = xhr
+        self.rounds = 0
+        self.saved_ms = 0
+        self.last_wait_ms = 0
+
+    def _wait_for_change(self, timeout_ms):
+        """변화가 생기면 True (settle 후), timeout_ms 동안 없으면 False. 경과 ms 기록"""
+        t0 = time.perf_counter()
+        count0, height0 = self.page.evaluate(self._STATE_JS)
+        n_resp0 = self.xhr.n_responses if self.xhr is not None else 0
+        changed = False
+        while (time.perf_counter() - t0) * 1000 < timeout_ms:
+            # wait_for_timeout 동안 Playwright 이벤트(response 리스너)도 처리됨
+            self.page.wait_for_timeout(SCROLL_POLL_MS)
+            if self.xhr is not None and self.xhr.n_responses > n_resp0:
+                changed = True
+                break
+            count, height = self.page.evaluate(self._STATE_JS)
+            if count > count0 or height > height0:
+                changed = True
+                break
+        if changed:
+            self.page.wait_for_timeout(SCROLL_SETTLE_MS)
+        self.last_wait_ms = int((time.perf_counter() - t0) * 1000)
+        return changed
+
+    def scroll(self):
+        """맨 아래로 스크롤 후 로드 대기. 새로 로드된 것이 있으면 True"""
+        self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        changed = self._wait_for_change(SCROLL_IDLE_MS)
+        self.rounds += 1
+        self.saved_ms += _FIXED_SCROLL_MS - self.last_wait_ms
+        return changed
+
+    def confirm_end(self):
+        """변화 없던 라운드 뒤 한 번 더 기다려 봄. 여전히 변화 없으면 True (페이지 끝)"""
+        changed = self._wait_for_change(END_CONFIRM_MS)
+        self.saved_ms += _FIXED_END_MS - self.last_wait_ms
+        return not changed
+
+
+def scroll_collect(page, sink, matcher, car_type="", target_count=None, xhr=None):
+    """
+    현재 적용된 차종 목록을 무한 스크롤로 수집 (target_count가 있으면 이 차종에서 그 개수만).
+    xhr(XhrListCollector)가 응답을 받고 있으면 JSON에서, 아니면 DOM 카드에서 추출. 수집 건수 반환.
+    """
+    collected = 0
+    no_new_rounds = 0
+    xhr_fallback_warned = False
+    loader = ScrollLoader(page, xhr)
+    # 차종이 바뀌면 목록이 다시 그려지므로(노드 재사용 포함) 카드 표시 초기화 — 중복은 sink가 href로 거름
+    page.evaluate("() => document.querySelectorAll('[data-crawled]').forEach(el => el.removeAttribute('data-crawled'))")
+    while True:
+        if target_count is not None and collected >= target_count:
+            print(f" ✅ [{car_type}] 목표 {target_count}개 수집 완료")
+            break
+
+        prev_collected = collected
+        saved_before = loader.saved_ms
+        loaded = loader.scroll()
+
+        if xhr is not None and xhr.n_responses > 0:
+            # [XHR] 목록 API JSON에서 바로 행 생성 (seen 키는 DOM 카드 href와 같은 형식)
+            for rec in xhr.drain():
+                if target_count is not None and collected >= target_count:
+                    break
+                hash_id = car_hash_id(rec)
+                if hash_id and sink.claim(f"/market/cars/{hash_id}"):
+                    sink.append(card_from_api(rec, "", matcher, car_type=car_type))
+                    collected += 1
+        else:
+            if xhr is not None and not xhr_fallback_warned:
+                print("   ⚠️ 목록 API 응답을 아직 받지 못해 DOM 카드로 수집합니다.")
+                xhr_fallback_warned = True
+            # [DOM] 지난 라운드 이후 추가된 카드만 (라운드당 비용이 전체 카드 수와 무관)
+            for raw in read_new_cards(page):
+                if target_count is not None and collected >= target_count:
+                    break
+                if sink.claim((raw.get("href") or "").split("?")[0]):
+                    sink.append(card_from_dom(raw, matcher, car_type=car_type))
+                    collected += 1
+
+        if collected == prev_collected:
+            no_new_rounds += 1
+        else:
+            no_new_rounds = 0
+
+        progress = f"{collected}/{target_count}대" if target_count is not None else f"{collected}대"
+        print(f" 🔄 목록 수집 [{car_type}]: {progress} (총 {len(sink)}대) · 대기 {loader.last_wait_ms}ms, "
+              f"고정 대기 대비 {loader.saved_ms - saved_before}ms 절약")
+
+        if loaded:
+            no_new_rounds = 0
+        elif loader.confirm_end():
+            print(f"🏁 [{car_type}] 페이지 끝 도달 (총 {len(sink)}대)")
+            break
+        if no_new_rounds >= 2:
+            print(f"🏁 [{car_type}] 새 매물 없음, 수집 종료 (총 {len(sink)}대)")
+            break
+    print(f" ⏱️ [{car_type}] 스크롤 {loader.rounds}회, 고정 대기 대비 {loader.saved_ms / 1000:.1f}초 절약")
+    return collected
+
+
+def crawl_list_shard(browser, car_type, sink, matcher, target_count=None, list_source="dom", profile=None):
+    """
+    차종 하나(샤드)를 새 BrowserContext에서 수집해 sink에 적재하고 수집 건수 반환.
+    차종 선택 실패·페이지 오류는 예외로 올려 호출부(병렬 워커·작업 큐)가 처리하게 함
+    """
+    context = new_list_context(browser, profile)
+    try:
+        page = context.new_page()
+        xhr = XhrListCollector(page) if list_source == "xhr" else None
+        open_list_page(page)
+        if car_type and not select_car_type(page, car_type):
+            raise RuntimeError(f"차종 선택 실패: {car_type}")
+        return scroll_collect(page, sink, matcher, car_type, target_count, xhr)
+    finally:
+        context.close()
+
+
+def _list_worker(worker_id, tasks, sink, matcher, target_count, list_source, headless, profile):
+    """병렬 워커: 스레드마다 별도 Playwright·브라우저, 차종마다 새 BrowserContext (필터 상태 공유 없음)"""
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=headless)
+        try:
+            while True:
+                try:
+                    car_type = tasks.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    n = crawl_list_shard(browser, car_type, sink, matcher, target_count, list_source, profile)
+                    print(f" 🧵 워커{worker_id} [{car_type}] 완료: {n}대")
+                except Exception as e:
+                    print(f"   ⚠️ 워커{worker_id} [{car_type}] 수집 실패: {str(e)[:80]}")
+        finally:
+            browser.close()
+
+
+def crawl_list(page, car_types, sink, matcher, target_count=None, workers=1, list_source="dom", xhr=None, headless=False,
+               profile=None):
+    """
+    차종 목록(car_types, [""]이면 필터 없이 전체)을 수집해 sink에 적재.
+    workers <= 1 이면 기존처럼 page 한 탭에서 차종을 순서대로 전환하며 수집하고,
+    workers > 1 이면 차종별 독립 컨텍스트로 병렬 수집 (page는 차종 목록 읽기에만 쓰인 상태로 둠).
+    """
+    if workers <= 1 or len(car_types) <= 1:
+        prev = None
+        # 차종이 하나뿐(필터 없음 [""] 포함)이면 필터를 적용하지 않으므로 첫 로드 응답을 그대로 사용
+        apply_filter = len(car_types) > 1
+        for car_type in car_types:
+            if apply_filter:
+                if xhr is not None:
+                    # 이전 차종에서 남은 응답 폐기 — 차종 선택('N대 보기') 전에 비워야 필터 적용 첫 페이지 응답이 남음
+                    xhr.drain()
+                if not select_car_type(page, car_type, prev):
+                    continue
+            scroll_collect(page, sink, matcher, car_type, target_count, xhr)
+            prev = car_type
+        return sink.items
+
+    n_workers = min(workers, len(car_types))
+    print(f" 🧵 차종 {len(car_types)}개를 워커 {n_workers}개로 병렬 수집")
+    tasks = queue.Queue()
+    for car_type in car_types:
+        tasks.put(car_type)
+    threads = [
+        threading.Thread(target=_list_worker, args=(i + 1, tasks, sink, matcher, target_count, list_source, headless, profile),
+                         daemon=True)
+        for i in range(n_workers)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sink.items
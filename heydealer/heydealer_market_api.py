@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+헤이딜러 market 목록 API(JSON) → list_fields 행 변환.
+
+SPA가 무한 스크롤 때 호출하는 api.heydealer.com/v2/customers/web/market/cars 응답을
+page.on("response")로 받아(XhrListCollector) DOM 카드 대신 JSON에서 바로 목록 행을 만듭니다.
+해시 클래스(.css-*)가 바뀌어도 영향이 없고, 카드당 CDP 왕복이 없습니다.
+
+브라우저 없이 같은 API를 직접 호출하는 클라이언트(iter_market_cars, fetch_car_detail, detail_from_api)도
+제공합니다 — crawl_heydealer_list_detail_brand.py 의 ENGINE = "api" 에서 사용.
+
+응답 필드명은 SPA가 받는 JSON 기준이며 키가 바뀔 수 있어 후보 키를 여러 개 둡니다 (_pick).
+숫자 값은 목록 카드 표시 형식(예: '2024년 (23/11)', '3.3만km', '3,990만원')으로 맞춰 저장합니다.
+"""
+from datetime import datetime
+
+from common.rate_limiter import request_with_retry
+
+BASE_URL = "https://www.heydealer.com"
+# 목록 API 경로 (쿼리스트링 제외). 이 경로로 시작하는 JSON 응답만 수집
+MARKET_CARS_PATH = "/v2/customers/web/market/cars"
+MARKET_CARS_URL = "https://api.heydealer.com" + MARKET_CARS_PATH
+
+
+def _pick(d, *paths, default=""):
+    """'a.b.c' 형태 경로 후보 중 처음으로 값이 있는 것 반환"""
+    for path in paths:
+        cur = d
+        for key in path.split("."):
+            if not isinstance(cur, dict):
+                cur = None
+                break
+            cur = cur.get(key)
+        if cur not in (None, "", [], {}):
+            return cur
+    return default
+
+
+def extract_records(payload):
+    """목록 응답에서 차량 레코드 리스트 추출 (list 또는 {"results"|"cars"|"data": [...]})"""
+    if isinstance(payload, list):
+        return [r for r in payload if isinstance(r, dict)]
+    if isinstance(payload, dict):
+        for key in ("results", "cars", "data", "items"):
+            if isinstance(payload.get(key), list):
+                return [r for r in payload[key] if isinstance(r, dict)]
+    return []
+
+
+def next_page_url(payload):
+    """페이지네이션 응답이면 다음 페이지 URL (없으면 None)"""
+    return payload.get("next") if isinstance(payload, dict) else None
+
+
+def _fmt_year(rec):
+    year = _pick(rec, "detail.year", "year", "detail.model_year")
+    first_reg = str(_pick(rec, "detail.initial_registration_date", "detail.first_registration_date",
+                          "initial_registration_date", default=""))
+    if not year:
+        return ""
+    # '2023-11-02' → (23/11)
+    if len(first_reg) >= 7 and first_reg[4] in "-./":
+        return f"{year}년 ({first_reg[2:4]}/{first_reg[5:7]})"
+    return f"{year}년"
+
+
+def _fmt_km(rec):
+    km = _pick(rec, "detail.mileage", "mileage", default=None)
+    if km is None or isinstance(km, str):
+        return km or ""
+    if km >= 10000:
+        return f"{km / 10000:.1f}".rstrip("0").rstrip(".") + "만km"
+    return f"{km:,}km"
+
+
+def _fmt_price(rec):
+    price = _pick(rec, "price", "detail.price", "sale_price", "auction.price", default=None)
+    if price is None or isinstance(price, str):
+        return price or ""
+    return f"{price:,}만원"
+
+
+def car_hash_id(rec):
+    return str(_pick(rec, "hash_id", "id", "detail.hash_id"))
+
+
+def detail_url_for(hash_id):
+    return f"{BASE_URL}/market/cars/{hash_id}"
+
+
+def card_from_api(rec, idx, matcher, car_type=""):
+    """목록 API 레코드 1건 → _extract_card_heydealer와 같은 키의 dict"""
+    hash_id = car_hash_id(rec)
+    model_name = str(_pick(rec, "detail.model_part_name", "detail.full_name", "model_part_name", "full_name"))
+    data = {
+        "model_sn": idx, "brand_id": "", "brand_name": "", "car_type": car_type,
+        "model_cd": hash_id,
+        "detail_url": detail_url_for(hash_id),
+        "model_name": model_name,
+        "model_second_name": str(_pick(rec, "detail.model_second_part_name", "detail.sub_model_name", "detail.trim_name")),
+        "grade_name": str(_pick(rec, "detail.grade_part_name", "grade_part_name", "detail.grade_name")),
+        "year": _fmt_year(rec),
+        "km": _fmt_km(rec),
+        "sale_price": _fmt_price(rec),
+    }
+    matched = matcher.match(model_name) if matcher is not None else None
+    if not matched:
+        matched = matcher.match(str(_pick(rec, "detail.full_name", "full_name"))) if matcher is not None else None
+    if matched:
+        data["brand_id"], data["brand_name"] = matched["brand_id"], matched["brand_name"]
+    else:
+        data["brand_id"] = str(_pick(rec, "detail.brand.hash_id", "brand.hash_id"))
+        data["brand_name"] = str(_pick(rec, "detail.brand_name", "detail.brand.name", "brand.name", "brand_name"))
+    now = datetime.now()
+    data["date_crtr_pnttm"], data["create_dt"] = now.strftime("%Y%m%d"), now.strftime("%Y%m%d%H%M")
+    return data
+
+
+def _join_names(items):
+    """옵션 등 [{"name": ...}, ...] 또는 ["...", ...] → 'a, b, c'"""
+    if not isinstance(items, list):
+        return str(items or "")
+    names = [str(i.get("name") or i.get("title") or "") if isinstance(i, dict) else str(i) for i in items]
+    return ", ".join(n.strip() for n in names if n and n.strip())
+
+
+def image_urls(rec):
+    """상세 레코드의 이미지 URL 리스트 (중복 제거, 순서 유지)"""
+    urls = []
+    for key in ("detail.image_urls", "detail.images", "image_urls", "images"):
+        for img in _pick(rec, key, default=[]) or []:
+            url = img.get("url") or img.get("image_url") if isinstance(img, dict) else img
+            if url and url not in urls:
+                urls.append(url)
+    main = _pick(rec, "detail.main_image_url", "main_image_url")
+    if main and main not in urls:
+        urls.insert(0, main)
+    return urls
+
+
+def detail_from_api(rec, list_item):
+    """
+    상세 API 레코드 → detail_fields 형태 dict (_extract_detail_smart와 같은 키).
+    응답에 없는 항목은 빈 문자열로 두고, 저장 직전 목록 값으로 채우는 기존 병합 규칙을 그대로 따릅니다.
+    """
+    text = lambda *paths: str(_pick(rec, *paths)).replace("\n", " | ").strip()
+    res = {k: str(list_item.get(k, "")) for k in (
+        "model_sn", "brand_id", "brand_name", "model_cd", "model_name", "model_second_name", "grade_name",
+        "detail_url", "date_crtr_pnttm", "create_dt",
+    )}
+    res.update({
+        "year": _fmt_year(rec) or str(list_item.get("year", "")),
+        "km": _fmt_km(rec) or str(list_item.get("km", "")),
+        "refund": text("detail.refund_summary", "detail.refund", "refund"),
+        "guarantee": text("detail.guarantee_summary", "detail.heydealer_guarantee", "guarantee"),
+        "accident": text("detail.accident_summary", "detail.accident", "accident"),
+        "inner_car_wash": text("detail.inner_car_wash", "inner_car_wash"),
+        "insurance": text("detail.insurance_summary", "detail.my_car_insurance", "insurance"),
+        "exterior_description": text("detail.exterior_description", "exterior_description"),
+        "interior_description": text("detail.interior_description", "interior_description"),
+        "options": _join_names(_pick(rec, "detail.options", "detail.advanced_options", "options", default=[])),
+        "delivery_information": text("detail.delivery_information", "detail.release_information", "delivery_information"),
+        "recommendation_comment": text("detail.comment", "detail.recommendation_comment", "comment"),
+        "tire": text("detail.tire", "tire"),
+        "tinting": text("detail.tinting", "tinting"),
+        "car_key": text("detail.car_key", "car_key"),
+    })
+    return res
+
+
+def iter_market_cars(session, params=None, max_pages=None):
+    """
+    목록 API를 페이지 단위로 호출하며 차량 레코드를 하나씩 yield (브라우저 없음).
+    응답이 {"next": url} 형식이면 next를 따라가고(한 번 따라가면 next가 없을 때 종료),
+    리스트면 page 파라미터를 올리다가 빈 페이지에서 종료.
+    """
+    params = dict(params or {})
+    params.setdefault("page", 1)
+    url, n_pages = MARKET_CARS_URL + "/", 0
+    while url and (max_pages is None or n_pages < max_pages):
+        resp = request_with_retry(session, "GET", url, params=params, timeout=15)
+        if resp.status_code == 404:
+            return
+        resp.raise_for_status()
+        payload = resp.json()
+        records = extract_records(payload)
+        n_pages += 1
+        if not records:
+            return
+        yield from records
+        nxt = next_page_url(payload)
+        if nxt:
+            url, params = nxt, None
+        elif params is None:
+            # 이미 next URL로 페이지를 넘기던 중이면 next가 없을 때 종료 (page 파라미터로 되돌아가지 않음)
+            return
+        elif isinstance(payload, list) or "next" not in (payload or {}):
+            params = dict(params or {})
+            params["page"] = params.get("page", 1) + 1
+        else:
+            return
+
+
+def fetch_car_detail(session, hash_id):
+    """차량 상세 API JSON (없으면 None)"""
+    resp = request_with_retry(session, "GET", f"{MARKET_CARS_URL}/{hash_id}/", timeout=15)
+    if resp.status_code == 404:
+        return None
+    resp.raise_for_status()
+    return resp.json()
+
+
+class XhrListCollector:
+    """
+    page.on("response")로 목록 API JSON을 모아두는 수집기. 페이지 이동(goto) 전에 붙여야 첫 페이지 응답도 받습니다.
+    drain()은 지난 호출 이후 도착한 레코드만 돌려줍니다.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.n_responses = 0
+        self._records = []
+        page.on("response", self._on_response)
+
+    def _on_response(self, response):
+        try:
+            if MARKET_CARS_PATH not in response.url or response.request.method != "GET":
+                return
+            path = response.url.split("?")[0]
+            # 상세(/market/cars/{id}/) 응답 제외: 목록 경로 자체만
+            if not path.rstrip("/").endswith(MARKET_CARS_PATH):
+                return
+            if response.status != 200 or "json" not in (response.headers.get("content-type") or ""):
+                return
+            self._records.extend(extract_records(response.json()))
+            self.n_responses += 1
+        except Exception:
+            pass
+
+    def drain(self):
+        records, self._records = self._records, []
+        return records
+
+    def close(self):
+        try:
+            self.page.remove_listener("response", self._on_response)
+        except Exception:
+            pass
@@ -1,11 +1,38 @@
 import csv
 import logging
 import re
+import sys
 from pathlib import Path
 from datetime import datetime
 from urllib.parse import urljoin
 from playwright.sync_api import sync_playwright
 
+# 프로젝트 루트의 공용 모듈(common/) 사용
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from common.csv_writer import BufferedCsvWriter
+from common.image_downloader import ImageDownloader
+from common.image_store import ImageStore
+from common.listing_store import REBORNCAR_FP_FIELDS, ListingStore, listing_fingerprint
+from common.parquet_sink import with_parquet
+from common.rate_limiter import get_limiter
+from common.resource_blocker import BlockingProfile
+from common.scroll_driver import drive_lazy_load
+from reborncar_model_index import load_model_index
+
+# 브라우저 실행 옵션
+# HEADLESS: 운영(서버)에서는 True, 화면 확인이 필요할 때만 False
+HEADLESS = False
+# BLOCK_RESOURCES: 목록·상세 탭에서 이미지·미디어·폰트·외부 분석 스크립트 요청 차단
+#   (img src 속성은 남고, save_detail_images는 URL만 모아 ImageDownloader가 따로 받으므로 이미지 저장은 그대로)
+BLOCK_RESOURCES = True
+# SKIP_UNCHANGED: 목록 값(가격·상태 등 REBORNCAR_FP_FIELDS)이 지난 실행과 같은 매물은 상세 탭을 열지 않고
+#   cache/listing_store.sqlite3에 저장된 상세 행을 다시 씀
+#   (상세 행과 같이 저장해 둔 이미지 URL로 오늘 날짜 폴더에 이미지를 다시 둠 — 이미 받은 URL은 저장소 원본 하드링크라 재요청 없음)
+SKIP_UNCHANGED = True
+# PARQUET_OUTPUT: list/detail CSV와 같은 행을 result/reborncar/parquet/<이름>/date=YYYYMMDD/part.parquet 로도 저장
+#   (정수·날짜 타입, 차종·상태 등은 범주형 인코딩). pyarrow가 없으면 CSV만 저장
+PARQUET_OUTPUT = True
+
 def setup_logger():
     log_dir = Path("./logs/reborncar")
     log_dir.mkdir(parents=True, exist_ok=True)
@@ -43,8 +70,8 @@ def load_brand_model_map(result_dir):
         pass
     return model_to_brand, model_to_car_list
 
-def _get_model_key_for_lp_car_name(lp_car_name, model_keys):
-    """lp_car_name으로 model_keys 중 매칭되는 키 반환. 없으면 None."""
+def _get_model_key_for_lp_car_name(lp_car_name, model_keys, model_index=None):
+    """lp_car_name으로 model_keys 중 매칭되는 키 반환. 정확·마지막 단어 매칭 실패 시 model_index(정규화·퍼지)로 조회. 없으면 None."""
     name = (lp_car_name or "").strip()
     if not name or not model_keys:
         return None
@@ -55,62 +82,69 @@ def _get_model_key_for_lp_car_name(lp_car_name, model_keys):
         last_part = parts[-1].strip()
         if last_part in model_keys:
             return last_part
+    if model_index is not None:
+        key = model_index.lookup(name)
+        if key in model_keys:
+            return key
     return None
 
-def get_brand_for_lp_car_name(lp_car_name, model_to_brand):
-    """lp_car_name과 brand의 model_list(| 앞) 매칭. 실패 시 lp_car_name 뒤에서 띄어쓰기 기준 마지막 부분으로 재매칭."""
-    key = _get_model_key_for_lp_car_name(lp_car_name, model_to_brand)
+def get_brand_for_lp_car_name(lp_car_name, model_to_brand, model_index=None):
+    """lp_car_name과 brand의 model_list(| 앞) 매칭. 실패 시 마지막 단어 → 정규화/퍼지 인덱스 순으로 재매칭."""
+    key = _get_model_key_for_lp_car_name(lp_car_name, model_to_brand, model_index)
     return model_to_brand[key] if key else "-"
 
-def get_car_list_for_lp_car_name(lp_car_name, model_to_car_list):
+def get_car_list_for_lp_car_name(lp_car_name, model_to_car_list, model_index=None):
     """lp_car_name으로 brand의 model_list(| 앞) 매칭 후 해당 car_list 반환."""
-    key = _get_model_key_for_lp_car_name(lp_car_name, model_to_car_list)
+    key = _get_model_key_for_lp_car_name(lp_car_name, model_to_car_list, model_index)
     return model_to_car_list.get(key, "-") if key else "-"
 
+# 이미지는 백그라운드 다운로더가 병렬로 받음 (브라우저 탭은 바로 다음 매물로 진행)
+# 원본은 해시 기준 한 번만 저장하고 날짜 폴더에는 하드링크 (URL→해시 인덱스로 재요청 방지)
+_img_downloader = ImageDownloader(headers={"Referer": "https://www.reborncar.co.kr/"}, store=ImageStore())
+
 def save_detail_images(page, product_id, save_dir, detail_url, logger):
-    """상세 페이지 vip-visual 영역 이미지를 product_id_1.png, product_id_2.png ... 로 저장."""
+    """
+    상세 페이지 vip-visual 영역 이미지 URL을 모아(중복 제거) 백그라운드 다운로더에 넘김.
+    product_id_1.jpg, product_id_2.webp ... 확장자는 응답 Content-Type 기준. 넘긴 URL 목록 반환 (상세 재사용 시 다시 씀)
+    """
     if not product_id or not save_dir:
-        return
-    save_dir = Path(save_dir)
-    save_dir.mkdir(parents=True, exist_ok=True)
+        return []
     base_url = detail_url.rsplit("?", 1)[0] if "?" in detail_url else detail_url
+    # 1) .detail-img 내 이미지, 없으면 img.detail-img 단일 / 2) .visual-con 내 이미지 — DOM 조회 1회
+    srcs = page.evaluate("""() => {
+        const pick = (sel) => Array.from(document.querySelectorAll(sel)).map((img) => img.getAttribute("src")).filter(Boolean);
+        const base = "#wrap .vip-section .vip-visual ";
+        let detail = pick(base + ".vip-visual-detail .visual-detail .detail-img img");
+        if (!detail.length) detail = pick(base + ".vip-visual-detail .visual-detail img.detail-img").slice(0, 1);
+        return detail.concat(pick(base + ".vip-visual-list .visual-box .visual-con img"));
+    }""")
     urls = []
-    # 1) #wrap .vip-section .vip-visual .vip-visual-detail .visual-detail .detail-img 내 이미지
-    detail_imgs = page.locator("#wrap .vip-section .vip-visual .vip-visual-detail .visual-detail .detail-img img")
-    for i in range(detail_imgs.count()):
-        src = detail_imgs.nth(i).get_attribute("src")
-        if src:
-            urls.append(src)
-    if not urls:
-        single = page.locator("#wrap .vip-section .vip-visual .vip-visual-detail .visual-detail img.detail-img").first
-        if single.count() > 0:
-            src = single.get_attribute("src")
-            if src:
-                urls.append(src)
-    # 2) .vip-visual-list .visual-box .visual-con 내 이미지
-    list_imgs = page.locator("#wrap .vip-section .vip-visual .vip-visual-list .visual-box .visual-con img")
-    for i in range(list_imgs.count()):
-        src = list_imgs.nth(i).get_attribute("src")
-        if src:
-            urls.append(src)
-    saved_count = 0
-    for idx, src in enumerate(urls, start=1):
-        try:
-            full_url = urljoin(base_url, src) if not (src.startswith("http") or src.startswith("//")) else ("https:" + src if src.startswith("//") else src)
-            resp = page.request.get(full_url)
-            if resp.ok:
-                path = save_dir / f"{product_id}_{idx}.png"
-                path.write_bytes(resp.body())
-                # logger.info(f"이미지 저장: {path}")
-                saved_count += 1
-        except Exception as e:
-            logger.warning(f"이미지 저장 실패 ({product_id}_{idx}): {e}")
-    if saved_count > 0:
-        # 이미지 저장된거 log로 출력
-        logger.info(f"{product_id} 이미지 수집 완료")
+    for src in srcs:
+        full_url = urljoin(base_url, src) if not (src.startswith("http") or src.startswith("//")) else ("https:" + src if src.startswith("//") else src)
+        # svg 아이콘은 제외 (헤이딜러 download_image와 동일)
+        if "svg" in full_url.lower():
+            continue
+        if full_url not in urls:
+            urls.append(full_url)
+    submit_detail_images(product_id, urls, save_dir)
+    if urls:
+        # 이미지 다운로드 예약된거 log로 출력 (저장 결과는 종료 시 집계)
+        logger.info(f"{product_id} 이미지 {len(urls)}장 다운로드 예약")
+    return urls
+
+def submit_detail_images(product_id, urls, save_dir):
+    """이미지 URL 목록을 product_id_1, product_id_2 ... 순서로 다운로더에 예약 (이전에 받은 URL은 저장소 하드링크)"""
+    if not product_id or not save_dir:
+        return
+    save_dir = Path(save_dir)
+    for idx, full_url in enumerate(urls, start=1):
+        _img_downloader.submit(full_url, save_dir / f"{product_id}_{idx}.png", detect_ext=True)
 
 def get_detail_info(page, product_id, logger, img_save_dir=None):
-    """상세 페이지에서 추가 데이터를 추출하는 함수. img_save_dir이 있으면 vip-visual 이미지 저장."""
+    """
+    상세 페이지에서 추가 데이터를 추출하는 함수. img_save_dir이 있으면 vip-visual 이미지 저장.
+    예약한 이미지 URL 목록은 "_image_urls" 키로 같이 반환 (CSV 컬럼 아님)
+    """
     detail_url = f"https://www.reborncar.co.kr/smartbuy/SB1002.rb?productId={product_id}"
     detail_data = {
         "info_list_1": "-", "aci_gbn": "-", "info_tit_1": "-", "special_carhistory": "-",
@@ -125,6 +159,7 @@ def get_detail_info(page, product_id, logger, img_save_dir=None):
     }
 
     try:
+        get_limiter().acquire(detail_url)
         page.goto(detail_url, wait_until="domcontentloaded")
         page.wait_for_selector("#info", timeout=10000)
         # 동적 영역 로딩 대기 (vip-body·aqi 섹션) — 빈값 방지
@@ -349,7 +384,9 @@ def get_detail_info(page, product_id, logger, img_save_dir=None):
         if img_save_dir:
             try:
                 page.wait_for_selector(".vip-section .vip-visual", state="visible", timeout=5000)
-                save_detail_images(page, product_id, img_save_dir, detail_url, logger)
+                # vip-visual 구간만 뷰포트 단위로 훑어 레이지 이미지 src 채운 뒤 저장
+                drive_lazy_load(page, root=".vip-section .vip-visual")
+                detail_data["_image_urls"] = save_detail_images(page, product_id, img_save_dir, detail_url, logger)
             except Exception as img_e:
                 logger.warning(f"이미지 저장 스킵 ({product_id}): {img_e}")
 
@@ -382,6 +419,8 @@ def run_full_crawler():
         "car_main_pay", "amtsel", "status", "copytext", "endtimedeal", "date_crtr_pnttm", "create_dt"
     ]
     brand_model_map, model_to_car_list = load_brand_model_map(result_dir)
+    # lp_car_name 정규화·퍼지 매칭 인덱스 (brand CSV가 바뀌었을 때만 재생성)
+    model_index = load_model_index(result_dir)
     detail_headers = [
         "model_sn", "product_id", "car_number", "gear_box", "car_color", "car_fuel", "plan_pay",
         "info_list_1", "aci_gbn", "info_tit_1", "special_carhistory", "relamt_per-parent",
@@ -396,14 +435,23 @@ def run_full_crawler():
     car_counter = 1
 
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False)
+        browser = p.chromium.launch(headless=HEADLESS)
         context = browser.new_context(user_agent="Mozilla/5.0...", viewport={'width': 1900, 'height': 1000})
+        profile = BlockingProfile() if BLOCK_RESOURCES else None
+        store = ListingStore() if SKIP_UNCHANGED else None
+        # 목록·상세 CSV는 실행 내내 열어 두고 묶음으로 기록 (헤더는 새 파일에 한 번, 페이지마다 fsync 체크포인트)
+        list_csv = with_parquet(BufferedCsvWriter(list_path, list_headers), result_dir, "reborncar_list", PARQUET_OUTPUT, pnttm)
+        detail_csv = with_parquet(BufferedCsvWriter(detail_path, detail_headers), result_dir, "reborncar_detail", PARQUET_OUTPUT, pnttm)
+        if profile is not None:
+            profile.apply(context)
         page = context.new_page()
         detail_page = context.new_page() # 상세페이지용 별도 탭
 
         try:
             logger.info("리본카 목록 페이지 접속...")
-            page.goto("https://www.reborncar.co.kr/smartbuy/SB1001.rb")
+            list_url = "https://www.reborncar.co.kr/smartbuy/SB1001.rb"
+            get_limiter().acquire(list_url)
+            page.goto(list_url)
             page.wait_for_selector("ul.lp-box.smartbuy-lp", timeout=60000)
 
             # 차종 필터: .check-btn-box.car-type-filter 내 checkbox 버튼들
@@ -489,37 +537,45 @@ def run_full_crawler():
                             list_row = {
                                 "model_sn": car_counter, "product_id": v_product_id, "car_type_name": current_car_type,
                                 "lp_car_name": v_lp_car_name,
-                                "brand_list": get_brand_for_lp_car_name(v_lp_car_name, brand_model_map),
-                                "car_list": get_car_list_for_lp_car_name(v_lp_car_name, model_to_car_list),
+                                "brand_list": get_brand_for_lp_car_name(v_lp_car_name, brand_model_map, model_index),
+                                "car_list": get_car_list_for_lp_car_name(v_lp_car_name, model_to_car_list, model_index),
                                 "lp_car_trim": item.locator(".lp-car-trim").inner_text().strip(),
                                 "release_dt": v_year, "car_navi": v_navi, "car_seat": v_seat,
                                 "car_main_pay": v_finamt, "amtsel": v_amtsel, "status": v_status,
                                 "copytext": v_copy, "endtimedeal": v_endtd,
                                 "date_crtr_pnttm": pnttm, "create_dt": create_dt_full
                             }
-                            with open(list_path, "a", newline="", encoding="utf-8-sig") as fl:
-                                wl = csv.DictWriter(fl, fieldnames=list_headers)
-                                if car_counter == 1:
-                                    wl.writeheader()
-                                wl.writerow(list_row)
+                            list_csv.writerow(list_row)
 
                             # detail.csv 행 (상세 데이터, 준비중/판매완료 제외 시에만 수집; 실패 시에도 빈 행 1건 반드시 기록해 list/detail 행 수 일치)
-                            def write_detail_row(detail_row_dict):
-                                with open(detail_path, "a", newline="", encoding="utf-8-sig") as fd:
-                                    wd = csv.DictWriter(fd, fieldnames=detail_headers)
-                                    if car_counter == 1:
-                                        wd.writeheader()
-                                    wd.writerow(detail_row_dict)
-
-                            if v_product_id and v_status not in ["준비중", "판매완료"]:
+                            write_detail_row = detail_csv.writerow
+
+                            v_want_detail = bool(v_product_id) and v_status not in ["준비중", "판매완료"]
+                            v_fp = listing_fingerprint(list_row, REBORNCAR_FP_FIELDS)
+                            cached = store.get("reborncar", v_product_id, v_fp) if v_want_detail and store is not None else None
+                            # 이미지 URL 없이 저장된 예전 행은 상세를 다시 수집 (날짜 폴더 이미지가 빠지지 않게)
+                            if cached is not None and "_image_urls" not in cached:
+                                cached = None
+                            if cached is not None:
+                                # 목록 값이 그대로인 매물: 상세 탭 이동 없이 지난 상세 행 재사용 (순번·수집 시각만 이번 값)
+                                # 이미지는 저장해 둔 URL로 오늘 폴더에 다시 둠 (이미 받은 URL은 재요청 없이 하드링크)
+                                submit_detail_images(v_product_id, cached.pop("_image_urls"), img_save_dir)
+                                cached.update({"model_sn": car_counter, "date_crtr_pnttm": pnttm, "create_dt": create_dt_full})
+                                write_detail_row(cached)
+                                detail_count_this_page += 1
+                            elif v_want_detail:
                                 try:
                                     v_details = get_detail_info(detail_page, v_product_id, logger, img_save_dir=img_save_dir)
+                                    v_image_urls = v_details.pop("_image_urls", [])
                                     detail_row = {"model_sn": car_counter, "product_id": v_product_id}
                                     detail_row.update({k: v_details.get(k, "-") for k in detail_headers if k not in ("model_sn", "product_id")})
                                     detail_row["date_crtr_pnttm"] = pnttm
                                     detail_row["create_dt"] = create_dt_full
                                     write_detail_row(detail_row)
                                     detail_count_this_page += 1
+                                    # 상세 값이 하나라도 채워졌을 때만 저장 (추출 실패로 전부 '-'인 행은 다음 실행에 재수집)
+                                    if store is not None and any(v_details.get(k, "-") not in ("-", "") for k in v_details):
+                                        store.put("reborncar", v_product_id, v_fp, {**detail_row, "_image_urls": v_image_urls})
                                 except Exception as de:
                                     logger.warning(f"상세 수집 실패 (product_id={v_product_id}): {de} → 빈 행 기록")
                                     detail_row = {k: "-" for k in detail_headers}
@@ -543,6 +599,8 @@ def run_full_crawler():
 
                     logger.info(f"목록 {current_page}페이지 수집 완료 → list.csv 저장 (이번 페이지 {len(items)}건)")
                     logger.info(f"상세 {current_page}페이지 수집 완료 → detail.csv 저장 (이번 페이지 {detail_count_this_page}건)")
+                    list_csv.checkpoint()
+                    detail_csv.checkpoint()
 
                     # 페이지네이션: 다음 번호 있으면 클릭, 없으면 다음 블록(>) → 둘 다 없으면 수집 종료
                     # (테스트용: TEST_PAGE_LIMIT 설정 시 N페이지 도달하면 여기서 break)
@@ -586,6 +644,16 @@ def run_full_crawler():
                         logger.warning(f"차종 칩 제거 실패 ({current_car_type}): {e}")
 
         finally:
+            list_csv.close()
+            detail_csv.close()
+            if profile is not None:
+                logger.info(f"리소스 차단: {profile.summary()}")
+            if store is not None:
+                logger.info(f"상세 재사용: {store.summary()}")
+                store.close()
+            logger.info(f"남은 이미지 {_img_downloader.pending()}건 다운로드 마무리 중...")
+            _img_downloader.close()
+            logger.info(_img_downloader.summary())
             browser.close()
 
 if __name__ == "__main__":
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+리본카 lp_car_name → reborncar_brand_list.csv model_list 키 매칭 인덱스.
+
+- 정규화 키: 기간 접미사 '(18~21년)'·'|' 뒷부분 제거, 공백·중점 제거, 소문자화 → '올 뉴K3' / '올뉴 K3' 가 같은 키
+- 조회 순서: 정규화 전체 일치 → 단어 구간(긴 것부터) 일치 → 문자 bigram Dice 점수 최고 후보 (MIN_SCORE 이상)
+- 인덱스는 brand CSV 옆 pickle로 저장하고, CSV 크기·수정시각이 같으면 재사용합니다.
+"""
+import csv
+import pickle
+import re
+from pathlib import Path
+
+# 퍼지 매칭 최소 점수 (Dice 계수 0~1). 낮추면 매칭률↑ 오매칭↑
+MIN_SCORE = 0.6
+# 이름 안에 통째로 들어 있는 후보 키 가산의 최소 키 길이 (정규화 후 글자 수). '레이'·'k3' 같은 짧은 키는
+# 다른 모델 이름의 일부로 우연히 들어가는 경우가 많아 가산하지 않음 (통째 단어 일치는 단어 구간 단계에서 처리)
+MIN_SUBSTRING_LEN = 3
+_PICKLE_VERSION = 1
+
+_PERIOD_RE = re.compile(r"\(\s*[\d~\-\s년.현재]*\)\s*$")
+_STRIP_RE = re.compile(r"[\s·∙ㆍ\-_]+")
+
+
+def normalize_model_key(text):
+    """'올 뉴K3|(18~21년)' → '올뉴k3'"""
+    s = (text or "").split("|")[0].strip()
+    s = _PERIOD_RE.sub("", s)
+    return _STRIP_RE.sub("", s).lower()
+
+
+def _bigrams(s):
+    return {s[i:i + 2] for i in range(len(s) - 1)} if len(s) > 1 else {s}
+
+
+class ModelIndex:
+    def __init__(self, model_keys=()):
+        # 정규화 키 → 원래 model_key (처음 나온 것 유지, load_brand_model_map과 동일)
+        self.exact = {}
+        # bigram → 정규화 키 집합 (퍼지 후보 검색용)
+        self.grams = {}
+        self._memo = {}
+        for key in model_keys:
+            norm = normalize_model_key(key)
+            if not norm or norm in self.exact:
+                continue
+            self.exact[norm] = key
+            for g in _bigrams(norm):
+                self.grams.setdefault(g, set()).add(norm)
+
+    def _fuzzy(self, norm):
+        q = _bigrams(norm)
+        counts = {}
+        for g in q:
+            for cand in self.grams.get(g, ()):
+                counts[cand] = counts.get(cand, 0) + 1
+        best, best_score = None, 0.0
+        for cand, shared in counts.items():
+            score = 2 * shared / (len(q) + len(_bigrams(cand)))
+            # 후보 키가 이름 안에 통째로 들어 있으면 (브랜드·트림 등 앞뒤 글자만 다른 경우) 이름에서 차지하는 비율로 가산
+            # — 하한 없이 비율 자체가 MIN_SCORE를 넘어야 하므로 긴 이름 속 짧은 키('EV6 레이싱' → '레이')는 매칭되지 않음
+            if len(cand) >= MIN_SUBSTRING_LEN and cand in norm:
+                score = max(score, len(cand) / len(norm))
+            if score > best_score or (score == best_score and best is not None and len(cand) > len(best)):
+                best, best_score = cand, score
+        return best if best_score >= MIN_SCORE else None
+
+    def lookup(self, lp_car_name):
+        """lp_car_name에 가장 잘 맞는 원래 model_key. 없으면 None"""
+        name = (lp_car_name or "").strip()
+        if not name:
+            return None
+        if name in self._memo:
+            return self._memo[name]
+        found = None
+        norm = normalize_model_key(name)
+        if norm in self.exact:
+            found = norm
+        else:
+            words = name.split()
+            # 단어 구간: 긴 구간부터, 같은 길이면 뒤쪽 구간 우선 (기존 '마지막 단어' 매칭과 같은 방향)
+            for size in range(len(words) - 1, 0, -1):
+                for start in range(len(words) - size, -1, -1):
+                    part = normalize_model_key(" ".join(words[start:start + size]))
+                    if part in self.exact:
+                        found = part
+                        break
+                if found:
+                    break
+            if not found and norm:
+                found = self._fuzzy(norm)
+        result = self.exact[found] if found else None
+        self._memo[name] = result
+        return result
+
+
+def _signature(path):
+    st = Path(path).stat()
+    return (_PICKLE_VERSION, MIN_SCORE, st.st_size, st.st_mtime_ns)
+
+
+def load_model_index(result_dir):
+    """result_dir/reborncar_brand_list.csv 기반 ModelIndex (pickle 캐시 사용). 파일 없으면 빈 인덱스"""
+    brand_path = Path(result_dir) / "reborncar_brand_list.csv"
+    if not brand_path.exists():
+        return ModelIndex()
+    sig = _signature(brand_path)
+    cache_path = brand_path.with_suffix(".model_index.pkl")
+    if cache_path.exists():
+        try:
+            with open(cache_path, "rb") as f:
+                cached_sig, exact, grams = pickle.load(f)
+            if cached_sig == sig:
+                index = ModelIndex()
+                index.exact, index.grams = exact, grams
+                return index
+        except Exception:
+            pass
+    with open(brand_path, "r", encoding="utf-8-sig", newline="") as f:
+        keys = [(row.get("model_list") or "").split("|")[0].strip()
+                for row in csv.DictReader(f) if (row.get("brand_list") or "").strip()]
+    index = ModelIndex(keys)
+    try:
+        with open(cache_path, "wb") as f:
+            pickle.dump((sig, index.exact, index.grams), f, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError:
+        pass
+    return index